@@ -3,19 +3,30 @@ import socket
 import ssl
 import sys
 import threading
+import time
 import typing
+from collections import deque
+from concurrent.futures import Future
 from contextlib import contextmanager
 from importlib import import_module
+from itertools import islice
 from pathlib import Path
 from ssl import SSLContext
 from typing import TypeVar, Callable, Union, Optional, Awaitable, Coroutine, Any, Dict
 
 import sniffio
+from async_generator import async_generator, yield_
 
 from .abc import (  # noqa: F401
     IPAddressType, CancelScope, UDPSocket, Lock, Condition, Event, Semaphore, Queue, TaskGroup,
-    Stream, SocketStreamServer, SocketStream, AsyncFile)
-from . import _networking
+    Stream, SocketStreamServer, SocketStream, AsyncFile, MemoryMappedFile, SpooledTemporaryFile,
+    GroupCommitWriter, Runner)
+from . import _filecopy, _inotify, _networking, _processes, _threads
+from .exceptions import CancelledError
+from ._inotify import FileChange  # noqa: F401
+from ._logging import AsyncLogHandler  # noqa: F401
+from ._threads import (  # noqa: F401
+    BlockingPortal, ThreadChannel, WorkerLane, WorkerPoolStatistics)
 
 BACKENDS = 'asyncio', 'curio', 'trio'
 
@@ -45,15 +56,7 @@ def run(func: Callable[..., Coroutine[Any, Any, T_Retval]], *args,
     :raises LookupError: if the named backend is not found
 
     """
-    asynclib_name = _detect_running_asynclib()
-    if asynclib_name:
-        raise RuntimeError('Already running {} in this thread'.format(asynclib_name))
-
-    try:
-        asynclib = import_module('{}._backends.{}'.format(__name__, backend))
-    except ImportError as exc:
-        raise LookupError('No such backend: {}'.format(backend)) from exc
-
+    asynclib = _get_asynclib_for_new_loop(backend)
     token = None
     if sniffio.current_async_library_cvar.get(None) is None:
         # Since we're in control of the event loop, we can cache the name of the async library
@@ -67,16 +70,53 @@ def run(func: Callable[..., Coroutine[Any, Any, T_Retval]], *args,
             sniffio.current_async_library_cvar.reset(token)
 
 
+def create_runner(backend: str = BACKENDS[0],
+                  backend_options: Optional[Dict[str, Any]] = None) -> Runner:
+    """
+    Create an event loop that can run several coroutine functions, one after another.
+
+    The current thread must not be already running an event loop.
+
+    .. note:: The trio backend cannot run its event loop piecemeal, so its runner keeps the event
+        loop running in a separate thread and the coroutine functions are run there.
+
+    :param backend: name of the asynchronous event loop implementation – one of ``asyncio``,
+        ``curio`` and ``trio``
+    :param backend_options: keyword arguments to pass to the backend's event loop
+    :return: a runner object
+    :raises RuntimeError: if an asynchronous event loop is already running in this thread
+    :raises LookupError: if the named backend is not found
+
+    """
+    asynclib = _get_asynclib_for_new_loop(backend)
+    return asynclib.Runner(**(backend_options or {}))
+
+
+def _get_asynclib_for_new_loop(backend: str):
+    asynclib_name = _detect_running_asynclib()
+    if asynclib_name:
+        raise RuntimeError('Already running {} in this thread'.format(asynclib_name))
+
+    try:
+        return import_module('{}._backends.{}'.format(__name__, backend))
+    except ImportError as exc:
+        raise LookupError('No such backend: {}'.format(backend)) from exc
+
+
 @contextmanager
-def claim_worker_thread(backend) -> typing.Generator[Any, None, None]:
+def claim_worker_thread(backend,
+                        cancel_status: Optional[_threads.ThreadCancelStatus] = None
+                        ) -> typing.Generator[Any, None, None]:
     module = sys.modules['anyio._backends.' + backend]
     _local.current_async_module = module
+    _local.cancel_status = cancel_status
     token = sniffio.current_async_library_cvar.set(backend)
     try:
         yield
     finally:
         sniffio.current_async_library_cvar.reset(token)
         del _local.current_async_module
+        del _local.cancel_status
 
 
 def _detect_running_asynclib() -> Optional[str]:
@@ -212,16 +252,202 @@ def create_task_group() -> 'typing.AsyncContextManager[TaskGroup]':
 # Threads
 #
 
-def run_in_thread(func: Callable[..., T_Retval], *args) -> Awaitable[T_Retval]:
+def run_in_thread(func: Callable[..., T_Retval], *args, cancellable: bool = False,
+                  pool: Union[str, WorkerLane] = _threads.DEFAULT_POOL) -> Awaitable[T_Retval]:
     """
-    Start a thread that calls the given function with the given arguments.
+    Call the given function with the given arguments in a worker thread.
+
+    The worker threads are taken from a bounded pool shared by all event loops in the process.
+    If all the threads in the pool are busy, the call is queued until one becomes available.
+
+    Python threads cannot be interrupted, so a call that has started always runs to completion.
+    The function can, however, use :func:`check_cancelled_from_thread` to find out if the calling
+    task has been cancelled, and return early.
 
     :param func: a callable
     :param args: positional arguments for the callable
+    :param cancellable: ``True`` to abandon the thread and let the calling task proceed at once
+        if it is cancelled, ``False`` to wait for the function to return before letting the
+        cancellation take effect
+    :param pool: name of the worker thread pool to use, or a worker lane (see
+        :func:`create_worker_lane`)
     :return: an awaitable that yields the return value of the function.
 
     """
-    return _get_asynclib().run_in_thread(func, *args)
+    return _get_asynclib().run_in_thread(func, *args, cancellable=cancellable, pool=pool)
+
+
+@async_generator
+async def map_in_thread(func: Callable[[Any], T_Retval], iterable: typing.Iterable, *,
+                        chunksize: int = 1, max_concurrency: Optional[int] = None,
+                        ordered: bool = True, pool: str = _threads.DEFAULT_POOL):
+    """
+    Call the given function on each item of the iterable in worker threads.
+
+    The items are sent to the worker threads in chunks of ``chunksize`` items, so the event loop
+    only needs to be woken up once per chunk rather than once per item. At most
+    ``max_concurrency`` chunks are being processed at any time, and new chunks are only taken
+    from the iterable as results are consumed, so a slow consumer holds back the producer.
+
+    The iterable is consumed in the event loop thread. The function can use
+    :func:`check_cancelled_from_thread` to find out if the iteration has been stopped, but it
+    cannot use :func:`run_async_from_thread`.
+
+    If the iteration is stopped early, the chunks that have not been started are cancelled and
+    the chunks that are being processed are stopped before their next item.
+
+    :param func: a callable taking a single argument
+    :param iterable: an iterable of arguments for the callable
+    :param chunksize: number of items to process in one worker thread call
+    :param max_concurrency: maximum number of chunks being processed at once (defaults to the
+        maximum number of threads in the pool)
+    :param ordered: ``True`` to yield the results in the order of the items, ``False`` to yield
+        them as soon as their chunk has been processed
+    :param pool: name of the worker thread pool to use
+    :return: an asynchronous iterator that yields the return values of the function
+    :raises ValueError: if ``chunksize`` or ``max_concurrency`` is less than 1
+
+    """
+    def run_chunk(chunk: list) -> list:
+        _local.cancel_status = cancel_status
+        try:
+            results = []
+            for item in chunk:
+                if cancel_status.cancelled:
+                    break
+
+                results.append(func(item))
+
+            return results
+        finally:
+            del _local.cancel_status
+
+    def chunk_done(future) -> None:
+        with lock:
+            if not wakeup.done():
+                wakeup.set_result(None)
+
+    if chunksize < 1:
+        raise ValueError('chunksize must be at least 1')
+
+    if max_concurrency is None:
+        max_concurrency = get_max_worker_threads(pool)
+    elif max_concurrency < 1:
+        raise ValueError('max_concurrency must be at least 1')
+
+    asynclib = _get_asynclib()
+    worker_pool = _threads.get_worker_pool(pool)
+    cancel_status = await asynclib.create_thread_cancel_status()
+    iterator = iter(iterable)
+    pending = deque()  # type: typing.Deque[Future]
+    lock = threading.Lock()
+    wakeup = Future()  # type: Future
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < max_concurrency:
+                chunk = list(islice(iterator, chunksize))
+                if chunk:
+                    future = worker_pool.submit(run_chunk, chunk, target=func)
+                    if not ordered:
+                        future.add_done_callback(chunk_done)
+
+                    pending.append(future)
+                else:
+                    exhausted = True
+
+            if not pending:
+                break
+
+            if ordered:
+                results = await asynclib.wait_future(pending.popleft())
+            else:
+                # Wait until any of the chunks has been processed
+                with lock:
+                    if wakeup.done():
+                        wakeup = Future()
+
+                future = next((f for f in pending if f.done()), None)
+                if future is None:
+                    await asynclib.wait_future(wakeup)
+                    continue
+
+                pending.remove(future)
+                results = future.result()
+
+            for result in results:
+                await yield_(result)
+    finally:
+        cancel_status.cancelled = True
+        for future in pending:
+            future.cancel()
+
+
+def check_cancelled_from_thread() -> None:
+    """
+    Check if the task waiting on this worker thread has been cancelled.
+
+    This is a cheap check that does not involve the event loop thread. Long running blocking code
+    can call it periodically to stop early.
+
+    The task counts as cancelled if it has been cancelled while waiting on this thread, or if
+    the effective deadline it had when it called :func:`run_in_thread` has passed.
+
+    :raises anyio.exceptions.CancelledError: if the task has been cancelled
+    :raises RuntimeError: if called outside of an AnyIO worker thread
+
+    """
+    if _get_thread_cancel_status().cancel_called:
+        raise CancelledError
+
+
+def current_effective_deadline_from_thread() -> float:
+    """
+    Return the effective deadline of the task waiting on this worker thread.
+
+    This is the value :func:`current_effective_deadline` returned for the task when it called
+    :func:`run_in_thread`.
+
+    :return: a clock value from the event loop's internal clock (``float('inf')`` if there is no
+        deadline in effect)
+    :raises RuntimeError: if called outside of an AnyIO worker thread
+
+    """
+    return _get_thread_cancel_status().deadline
+
+
+def _get_thread_cancel_status() -> _threads.ThreadCancelStatus:
+    cancel_status = getattr(_local, 'cancel_status', None)
+    if cancel_status is None:
+        raise RuntimeError('This function can only be run from an AnyIO worker thread')
+
+    return cancel_status
+
+
+def get_max_worker_threads(pool: str = _threads.DEFAULT_POOL) -> int:
+    """
+    Return the maximum number of threads in the given worker thread pool.
+
+    :param pool: name of the worker thread pool
+    :return: the maximum number of threads
+
+    """
+    return _threads.get_worker_pool(pool).max_threads
+
+
+def set_max_worker_threads(value: int, pool: str = _threads.DEFAULT_POOL) -> None:
+    """
+    Set the maximum number of threads in the given worker thread pool.
+
+    AnyIO uses the ``fileio`` pool for asynchronous file I/O and the ``dns`` pool for blocking
+    name resolution. All other calls go to the ``default`` pool unless explicitly directed
+    elsewhere.
+
+    :param value: the maximum number of threads (must be at least 1)
+    :param pool: name of the worker thread pool
+
+    """
+    _threads.get_worker_pool(pool).max_threads = value
 
 
 def run_async_from_thread(func: Callable[..., Coroutine[Any, Any, T_Retval]], *args) -> T_Retval:
@@ -241,6 +467,170 @@ def run_async_from_thread(func: Callable[..., Coroutine[Any, Any, T_Retval]], *a
     return asynclib.run_async_from_thread(func, *args)
 
 
+def create_thread_channel(capacity: int) -> ThreadChannel:
+    """
+    Create a channel for sending items from threads to event loop tasks.
+
+    Any thread (including ones not started by AnyIO) can send items to the channel without
+    involving the event loop, and tasks in any event loop can receive them.
+
+    :param capacity: maximum number of items the channel will hold before senders are blocked
+    :return: a channel object
+    :raises ValueError: if ``capacity`` is less than 1
+
+    """
+    return ThreadChannel(capacity)
+
+
+def create_worker_lane(pool: str = _threads.DEFAULT_POOL) -> WorkerLane:
+    """
+    Create a lane for running calls one at a time, in order, in a worker thread pool.
+
+    Calls made with :func:`run_in_thread` through the lane (by passing it as ``pool``) run one at
+    a time, in the order they were made, even if they are made by different tasks at once. While
+    calls keep coming in, they all run in the same worker thread, one after another, so tasks can
+    queue up several calls without waiting for the earlier ones to finish.
+
+    :param pool: name of the worker thread pool the lane runs its calls in
+    :return: a worker lane
+
+    """
+    return WorkerLane(_threads.get_worker_pool(pool))
+
+
+def get_worker_pool_statistics(pool: str = _threads.DEFAULT_POOL) -> WorkerPoolStatistics:
+    """
+    Return a snapshot of the state of the given worker thread pool.
+
+    :param pool: name of the worker thread pool
+    :return: the pool statistics
+
+    """
+    return _threads.get_worker_pool(pool).statistics()
+
+
+def set_worker_pool_saturation_callback(
+        callback: Optional[Callable[[WorkerPoolStatistics], Any]],
+        pool: str = _threads.DEFAULT_POOL) -> None:
+    """
+    Set a function to be called when the given worker thread pool becomes saturated.
+
+    The pool is saturated when all of its threads are busy and the maximum number of threads has
+    been reached, so new calls have to wait in a queue. The callback is called once each time this
+    happens, with a snapshot of the pool statistics as the only argument. It is called again only
+    after the queue has been emptied.
+
+    The callback is called in the thread that submitted the call (usually the event loop thread),
+    so it must not block.
+
+    :param callback: a callable, or ``None`` to remove the existing callback
+    :param pool: name of the worker thread pool
+
+    """
+    _threads.get_worker_pool(pool).saturation_callback = callback
+
+
+def start_blocking_portal(
+        backend: str = BACKENDS[0],
+        backend_options: Optional[Dict[str, Any]] = None) -> BlockingPortal:
+    """
+    Start a new event loop in a new thread and return a portal for calling into it.
+
+    This lets synchronous code call asynchronous code repeatedly without starting a new event loop
+    every time. The portal can be used as a context manager which stops the event loop on exit.
+
+    :param backend: name of the asynchronous event loop implementation – one of ``asyncio``,
+        ``curio`` and ``trio``
+    :param backend_options: keyword arguments to call the backend ``run()`` implementation with
+    :return: a portal object
+    :raises LookupError: if the named backend is not found
+
+    """
+    portal = BlockingPortal(backend, backend_options)
+    portal._start()
+    return portal
+
+
+#
+# Processes
+#
+
+def run_in_process(func: Callable[..., T_Retval], *args) -> Awaitable[T_Retval]:
+    """
+    Call the given function with the given arguments in a worker process.
+
+    The worker processes are long lived and shared by all event loops in the process. If all the
+    workers are busy, the call is queued until one becomes available.
+
+    The function, its arguments and its return value must be picklable.
+
+    If the calling task is cancelled while waiting, the result is abandoned. A call that has not
+    yet been started is removed from the queue, but one that is already running is allowed to
+    run to completion.
+
+    :param func: a picklable callable
+    :param args: positional arguments for the callable
+    :return: an awaitable that yields the return value of the function.
+
+    """
+    return _get_asynclib().run_in_process(func, *args)
+
+
+def get_max_worker_processes() -> int:
+    """
+    Return the maximum number of worker processes used by :func:`run_in_process`.
+
+    :return: the maximum number of processes
+
+    """
+    return _processes.get_max_processes()
+
+
+def set_max_worker_processes(value: int) -> None:
+    """
+    Set the maximum number of worker processes used by :func:`run_in_process`.
+
+    Any existing worker processes are shut down once they have finished their current work. This
+    function blocks until they have done so.
+
+    :param value: the maximum number of processes (must be at least 1)
+
+    """
+    _processes.set_max_processes(value)
+
+
+async def run_in_worker(func: Callable[..., T_Retval], *args,
+                        pool: str = _threads.DEFAULT_POOL) -> T_Retval:
+    """
+    Call the given function in either a worker thread or a worker process.
+
+    The first calls to each callable are run in worker threads, where they are measured. If the
+    calls turn out to keep the CPU busy for most of their run time (which means they hold the GIL
+    and gain nothing from running in a thread), later calls are sent to the worker processes
+    used by :func:`run_in_process` instead. Callables that cannot be pickled, and calls that take
+    too little time to make up for the cost of transferring them to another process, always run
+    in threads.
+
+    Callables are told apart by their qualified names. Once a callable has been routed to the
+    worker processes, it stays there.
+
+    .. note:: Measuring needs :func:`time.thread_time`, so on Python versions older than 3.7 all
+        calls run in worker threads.
+
+    :param func: a callable
+    :param args: positional arguments for the callable (these must be picklable if the function
+        ends up running in a worker process)
+    :param pool: name of the worker thread pool to use for calls run in threads
+    :return: the return value of the function
+
+    """
+    profile = _processes.get_call_profile(func)
+    if profile.use_process(func):
+        return await run_in_process(func, *args)
+    else:
+        return await run_in_thread(profile.run, func, *args, pool=pool)
+
+
 #
 # Async file I/O
 #
@@ -248,12 +638,28 @@ def run_async_from_thread(func: Callable[..., Coroutine[Any, Any, T_Retval]], *a
 def aopen(file: Union[str, Path, int], mode: str = 'r', buffering: int = -1,
           encoding: Optional[str] = None, errors: Optional[str] = None,
           newline: Optional[str] = None, closefd: bool = True,
-          opener: Optional[Callable] = None) -> Coroutine[Any, Any, AsyncFile]:
+          opener: Optional[Callable] = None, *, async_buffer_size: int = 0,
+          pinned: bool = False) -> Coroutine[Any, Any, AsyncFile]:
     """
     Open a file asynchronously.
 
-    The arguments are exactly the same as for the builtin :func:`open`.
+    The arguments are exactly the same as for the builtin :func:`open`, except for
+    ``async_buffer_size`` and ``pinned``.
+
+    If ``async_buffer_size`` is given, the returned file reads ahead and writes behind in blocks of
+    that size, so that reading lines or making small writes does not need a worker thread for
+    every call. Buffered writes only reach the file when the buffer fills up, or when the file is
+    flushed, seeked, truncated or closed.
+
+    If ``pinned`` is ``True``, the operations on the file run one at a time, in the order they
+    were started, in a single worker thread at a time (see :func:`create_worker_lane`). This keeps
+    the order of operations started by concurrent tasks, and lets the operations of a busy file
+    run back to back in the same thread.
 
+    :param async_buffer_size: size of the blocks (in bytes, or characters in text mode) to read
+        and write in worker threads (0 to run every operation in a worker thread)
+    :param pinned: ``True`` to run all the operations on the file in order, in a single lane of
+        the file I/O worker thread pool
     :return: an asynchronous file object
     :rtype: AsyncFile
 
@@ -261,7 +667,330 @@ def aopen(file: Union[str, Path, int], mode: str = 'r', buffering: int = -1,
     if isinstance(file, Path):
         file = str(file)
 
-    return _get_asynclib().aopen(file, mode, buffering, encoding, errors, newline, closefd, opener)
+    return _get_asynclib().aopen(file, mode, buffering, encoding, errors, newline, closefd, opener,
+                                 async_buffer_size=async_buffer_size, pinned=pinned)
+
+
+def create_spooled_temporary_file(max_size: int = 0, mode: str = 'w+b', buffering: int = -1,
+                                  suffix: Optional[str] = None, prefix: Optional[str] = None,
+                                  dir: Optional[str] = None) -> SpooledTemporaryFile:
+    """
+    Create an asynchronous temporary file that is kept in memory until it grows too large.
+
+    This is an asynchronous counterpart to :class:`tempfile.SpooledTemporaryFile`. As long as the
+    file is kept in memory, its operations do not need worker threads. Only binary modes are
+    supported.
+
+    :param max_size: the size (in bytes) the file can grow to before it is moved to disk (0 to
+        keep it in memory no matter how large it grows)
+    :param mode: the mode for opening the file (once it is moved to disk)
+    :param buffering: the buffering policy for opening the file (once it is moved to disk)
+    :param suffix: suffix for the name of the temporary file
+    :param prefix: prefix for the name of the temporary file
+    :param dir: directory to create the temporary file in
+    :return: an asynchronous temporary file
+    :rtype: SpooledTemporaryFile
+    :raises ValueError: if ``mode`` is not a binary mode
+
+    """
+    return _get_asynclib().create_spooled_temporary_file(max_size, mode, buffering, suffix,
+                                                         prefix, dir)
+
+
+def create_group_commit_writer(file: AsyncFile) -> GroupCommitWriter:
+    """
+    Create a writer that commits concurrent writes to a file in batches.
+
+    This is meant for files, such as journals, that many tasks append to and that each task needs
+    its data to be durable in before it can proceed. Instead of every task flushing and syncing
+    the file on its own, the data written while a batch is being committed is gathered into the
+    next batch, which then takes one write and one sync.
+
+    Open the file in append mode. Any other writes to the file should go through the writer too.
+
+    :param file: an asynchronous file opened for appending
+    :return: a group commit writer
+    :rtype: GroupCommitWriter
+
+    """
+    return _get_asynclib().create_group_commit_writer(file)
+
+
+def _read_directory_entries(iterator, max_entries: int) -> list:
+    return list(islice(iterator, max_entries))
+
+
+@async_generator
+async def scandir(path: Union[str, Path, int] = '.', *, batch_size: int = 1000):
+    """
+    Iterate over the entries in a directory.
+
+    This is an asynchronous version of :func:`os.scandir`. The entries are read in batches of
+    ``batch_size``, with one worker thread call per batch.
+
+    .. note:: The ``is_dir()``, ``is_file()``, ``is_symlink()`` and ``stat()`` methods of the
+        entries may need a system call (which blocks the event loop) on some file systems. On most
+        platforms, ``stat()`` always does.
+
+    :param path: path of the directory (or, on Python 3.7 and later, a file descriptor referring
+        to one)
+    :param batch_size: number of entries to read in one worker thread call
+    :return: an asynchronous iterator yielding :class:`os.DirEntry` objects
+    :raises ValueError: if ``batch_size`` is less than 1
+
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+
+    if isinstance(path, Path):
+        path = str(path)
+
+    iterator = await run_in_thread(os.scandir, path, pool=_threads.FILEIO_POOL)
+    try:
+        while True:
+            entries = await run_in_thread(_read_directory_entries, iterator, batch_size,
+                                          pool=_threads.FILEIO_POOL)
+            for entry in entries:
+                await yield_(entry)
+
+            if len(entries) < batch_size:
+                break
+    finally:
+        if hasattr(iterator, 'close'):  # not available on Python 3.5
+            iterator.close()
+
+
+def _scan_directories(paths: list, followlinks: bool,
+                      max_entries: int) -> typing.Tuple[list, list]:
+    # Runs in a worker thread: lists directories from the end of the list until enough entries
+    # have been read, and returns (path, dirnames, filenames, unwalkable dirnames) or
+    # (path, exception, None, None) for each of them, along with the paths left unread
+    paths = list(paths)
+    results = []
+    entry_count = 0
+    while paths and entry_count < max_entries:
+        path = paths.pop()
+        dirnames, filenames, symlinks = [], [], set()
+        try:
+            for entry in os.scandir(path):
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+
+                if is_dir:
+                    dirnames.append(entry.name)
+                    if not followlinks and entry.is_symlink():
+                        symlinks.add(entry.name)
+                else:
+                    filenames.append(entry.name)
+        except OSError as exc:
+            results.append((path, exc, None, None))
+            continue
+
+        entry_count += len(dirnames) + len(filenames) + 1
+        results.append((path, dirnames, filenames, symlinks))
+
+    return results, paths
+
+
+@async_generator
+async def walk(top: Union[str, Path], *, onerror: Optional[Callable[[OSError], Any]] = None,
+               followlinks: bool = False, batch_size: int = 1000):
+    """
+    Walk a directory tree, top-down.
+
+    This is an asynchronous version of :func:`os.walk`. Like with :func:`os.walk`, the
+    ``dirnames`` list can be modified in place to prune the directories to descend into.
+
+    Several small directories may be read in a single worker thread call, until at least
+    ``batch_size`` entries have been read. Every directory is yielded before its subdirectories,
+    but otherwise the order differs from that of :func:`os.walk`.
+
+    :param top: path of the directory to walk
+    :param onerror: a callable that is called with the :exc:`OSError` if a directory cannot be
+        read (such directories are skipped)
+    :param followlinks: ``True`` to descend into symbolic links pointing to directories
+    :param batch_size: number of entries to read in one worker thread call
+    :return: an asynchronous iterator yielding ``(dirpath, dirnames, filenames)`` tuples
+    :raises ValueError: if ``batch_size`` is less than 1
+
+    """
+    if batch_size < 1:
+        raise ValueError('batch_size must be at least 1')
+
+    pending = [str(top)]
+    while pending:
+        results, pending = await run_in_thread(_scan_directories, pending, followlinks,
+                                               batch_size, pool=_threads.FILEIO_POOL)
+        for path, dirnames, filenames, symlinks in results:
+            if isinstance(dirnames, OSError):
+                if onerror is not None:
+                    onerror(dirnames)
+
+                continue
+
+            await yield_((path, dirnames, filenames))
+            pending.extend(os.path.join(path, name) for name in reversed(dirnames)
+                           if name not in symlinks)
+
+
+async def stat_many(paths: typing.Iterable[Union[str, Path]], *, follow_symlinks: bool = True,
+                    chunksize: int = 1000) -> typing.List[Optional[os.stat_result]]:
+    """
+    Get the status of many paths.
+
+    The paths are split into chunks of ``chunksize`` paths, and each chunk is handled by a single
+    worker thread call. Several chunks may be handled at once.
+
+    :param paths: the paths to look up
+    :param follow_symlinks: ``False`` to get the status of symbolic links themselves rather than
+        the files they point to
+    :param chunksize: number of paths to look up in one worker thread call
+    :return: a list of :class:`os.stat_result` objects, in the same order as the paths, with
+        ``None`` in place of any paths that do not exist
+    :raises ValueError: if ``chunksize`` is less than 1
+
+    """
+    def stat(path: Union[str, Path]) -> Optional[os.stat_result]:
+        if isinstance(path, Path):
+            path = str(path)
+
+        try:
+            return os.stat(path, follow_symlinks=follow_symlinks)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+
+    results = []
+    async for result in map_in_thread(stat, paths, chunksize=chunksize,
+                                      pool=_threads.FILEIO_POOL):
+        results.append(result)
+
+    return results
+
+
+async def copy_file(src: Union[str, Path], dst: Union[str, Path], *,
+                    chunk_size: int = _filecopy.DEFAULT_CHUNK_SIZE,
+                    progress: Optional[Callable[[int, int], Any]] = None) -> int:
+    """
+    Copy the contents of a file to another file.
+
+    Like :func:`shutil.copyfile`, this only copies the data, not the permissions or other
+    metadata. If the destination file exists, it is overwritten.
+
+    Where available, :func:`os.copy_file_range` is used so the data never leaves the kernel (and
+    may not need to be copied at all on file systems that support sharing data between files).
+    Otherwise :func:`os.sendfile` is used, and as a last resort, the file is read and written in
+    blocks.
+
+    The file is copied in chunks of ``chunk_size`` bytes, one worker thread call per chunk.
+    Cancellation takes effect between chunks.
+
+    :param src: path of the file to copy
+    :param dst: path of the file to copy to
+    :param chunk_size: number of bytes to copy in one worker thread call
+    :param progress: a callable that is called in the event loop thread after each chunk, with the
+        number of bytes copied so far and the size of the source file when the copying started
+    :return: the number of bytes copied
+    :raises shutil.SameFileError: if the source and destination are the same file
+    :raises ValueError: if ``chunk_size`` is less than 1
+
+    """
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be at least 1')
+
+    if isinstance(src, Path):
+        src = str(src)
+    if isinstance(dst, Path):
+        dst = str(dst)
+
+    copier = await run_in_thread(_filecopy.FileCopier.open, src, dst, pool=_threads.FILEIO_POOL)
+    try:
+        copied = 0
+        while True:
+            count = await run_in_thread(copier.copy_chunk, copied, chunk_size,
+                                        pool=_threads.FILEIO_POOL)
+            if not count:
+                return copied
+
+            copied += count
+            if progress is not None:
+                progress(copied, copier.size)
+    finally:
+        copier.close()
+
+
+@async_generator
+async def watch_path(*paths: Union[str, Path], recursive: bool = False, debounce: float = 0.1):
+    """
+    Watch files and directories for changes.
+
+    The changes are reported by the operating system (using inotify), so there is no polling
+    involved. Changes that follow each other in quick succession are collected into a single
+    batch: a batch is yielded once no new changes have come in for ``debounce`` seconds, or at the
+    latest ten times that long after its first change. Within a batch, the changes to each path
+    are combined, so a file that was created and then written to is only reported as added, and a
+    file that was created and then deleted is not reported at all.
+
+    When a directory is watched, changes to the entries in it are reported. When a file is
+    watched, changes to the file itself are reported. Note that many programs save files by
+    replacing them, which ends the watch on the replaced file, so watching the directory
+    containing the file is usually more reliable.
+
+    .. note:: This is currently only supported on Linux.
+
+    :param paths: the files and directories to watch
+    :param recursive: ``True`` to also watch all subdirectories of the given directories,
+        including ones created later
+    :param debounce: number of seconds without new changes before a batch is yielded
+    :return: an asynchronous iterator yielding sets of ``(change, path)`` tuples, where
+        ``change`` is a :class:`~anyio.FileChange`
+    :raises NotImplementedError: if the platform does not support inotify
+    :raises OverflowError: if changes happen faster than they can be processed, and the operating
+        system has dropped some of them
+
+    """
+    def record(path: str, change: FileChange) -> None:
+        changes[path] = _inotify.merge_change(changes.get(path), change)
+
+    inotify = _inotify.Inotify()
+    try:
+        for path in paths:
+            await run_in_thread(inotify.add_watches, str(path), recursive,
+                                pool=_threads.FILEIO_POOL)
+
+        while True:
+            await wait_socket_readable(inotify)
+            changes = {}  # type: Dict[str, Optional[FileChange]]
+            batch_deadline = time.monotonic() + debounce * 10
+            while True:
+                for path, mask in inotify.read_events():
+                    record(path, _inotify.get_change(mask))
+                    if recursive and mask & _inotify.IN_ISDIR and mask & (
+                            _inotify.IN_CREATE | _inotify.IN_MOVED_TO):
+                        # Watch the new directory too, and report anything created in it before
+                        # the watch was in place (unless it has already been removed again)
+                        found = await run_in_thread(inotify.add_watches, path, True, True,
+                                                    pool=_threads.FILEIO_POOL)
+                        for found_path in found:
+                            record(found_path, FileChange.added)
+
+                # Wait for more changes until things have settled down
+                delay = min(debounce, batch_deadline - time.monotonic())
+                readable = False
+                if delay > 0:
+                    async with move_on_after(delay):
+                        await wait_socket_readable(inotify)
+                        readable = True
+
+                if not readable:
+                    break
+
+            batch = {(change, path) for path, change in changes.items() if change is not None}
+            if batch:
+                await yield_(batch)
+    finally:
+        inotify.close()
 
 
 #
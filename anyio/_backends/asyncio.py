@@ -1,17 +1,19 @@
 import asyncio
-import concurrent.futures  # noqa: F401
+import concurrent.futures
 import inspect
-import os
 import socket
-from functools import partial
-from threading import Thread
+import weakref
 from typing import (
-    Callable, Set, Optional, Union, Tuple, cast, Coroutine, Any, Awaitable, TypeVar,
+    Callable, Set, Optional, Union, cast, Coroutine, Any, Awaitable, TypeVar,
     Generator)  # noqa: F401
 
 from async_generator import async_generator, yield_, asynccontextmanager, aclosing
 
+from .._fileio import (  # noqa: F401
+    aopen, create_group_commit_writer, create_spooled_temporary_file)
 from .._networking import BaseSocket
+from .._processes import get_process_pool
+from .._threads import get_executor, WorkerLane, CallbackBatch, ThreadCancelStatus
 from .. import abc, claim_worker_thread, _local, T_Retval
 from ..exceptions import ExceptionGroup, CancelledError, ClosedResourceError
 
@@ -142,6 +144,52 @@ def run(func: Callable[..., T_Retval], *args, debug: bool = False,
         return cast(T_Retval, retval)
 
 
+class Runner(abc.Runner):
+    def __init__(self, debug: bool = False,
+                 policy: Optional[asyncio.AbstractEventLoopPolicy] = None) -> None:
+        if policy is not None:
+            asyncio.set_event_loop_policy(policy)
+
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_debug(debug)
+        asyncio.set_event_loop(self._loop)
+
+    def run(self, func: Callable[..., T_Retval], *args) -> T_Retval:
+        async def wrapper():
+            nonlocal exception, retval
+            try:
+                retval = await func(*args)
+            except BaseException as exc:
+                exception = exc
+
+        if self._loop.is_closed():
+            raise RuntimeError('This runner has been closed')
+
+        exception = retval = None
+        self._loop.run_until_complete(wrapper())
+        if exception is not None:
+            raise exception
+        else:
+            return cast(T_Retval, retval)
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+
+        try:
+            to_cancel = all_tasks(self._loop)
+            for task in to_cancel:
+                task.cancel()
+
+            if to_cancel:
+                self._loop.run_until_complete(asyncio.gather(*to_cancel, return_exceptions=True))
+
+            self._loop.run_until_complete(self._loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)  # type: ignore
+            self._loop.close()
+
+
 #
 # Miscellaneous
 #
@@ -365,111 +413,165 @@ async def create_task_group():
         elif exceptions:
             raise exceptions[0]
 
+
 #
 # Threads
 #
 
-_Retval_Queue_Type = Tuple[Optional[T_Retval], Optional[BaseException]]
+_callback_batches = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary
 
 
-async def run_in_thread(func: Callable[..., T_Retval], *args) -> T_Retval:
-    def thread_worker():
-        try:
-            with claim_worker_thread('asyncio'):
-                _local.loop = loop
-                result = func(*args)
-        except BaseException as exc:
-            loop.call_soon_threadsafe(queue.put_nowait, (None, exc))
-        else:
-            loop.call_soon_threadsafe(queue.put_nowait, (result, None))
+def get_callback_batch(loop: asyncio.AbstractEventLoop) -> CallbackBatch:
+    # Must be called from the event loop thread
+    def wake(func: Callable[[], None]) -> None:
+        # Only keep a weak reference to the loop so it can be garbage collected
+        target_loop = loop_ref()
+        if target_loop is not None:
+            try:
+                target_loop.call_soon_threadsafe(func)
+            except RuntimeError:
+                pass  # the event loop has been closed
 
-    check_cancelled()
-    loop = get_running_loop()
-    queue = asyncio.Queue(1)  # type: asyncio.Queue[_Retval_Queue_Type]
-    thread = Thread(target=thread_worker)
-    thread.start()
-    retval, exception = await queue.get()
-    if exception is not None:
-        raise exception
+    # Called in the event loop thread when a callback raises an exception
+    def handle_error(exc: Exception, func: Callable) -> None:
+        target_loop = loop_ref()
+        if target_loop is not None:
+            target_loop.call_exception_handler({
+                'message': 'Exception in callback {!r}'.format(func), 'exception': exc})
+
+    try:
+        return _callback_batches[loop]
+    except KeyError:
+        loop_ref = weakref.ref(loop)
+        batch = _callback_batches[loop] = CallbackBatch(wake, handle_error)
+        return batch
+
+
+def _copy_future_state(source: concurrent.futures.Future, dest: asyncio.Future) -> None:
+    if dest.cancelled():
+        return
+    elif source.cancelled():
+        dest.cancel()
+    elif source.exception() is not None:
+        exception = source.exception()
+        if isinstance(exception, StopIteration):
+            # asyncio futures refuse StopIteration, so convert it like a coroutine would
+            new_exception = RuntimeError('StopIteration raised in a worker thread')
+            new_exception.__cause__ = exception
+            exception = new_exception
+
+        dest.set_exception(exception)
     else:
-        return cast(T_Retval, retval)
+        dest.set_result(source.result())
 
 
-def run_async_from_thread(func: Callable[..., Coroutine[Any, Any, T_Retval]], *args) -> T_Retval:
-    f = asyncio.run_coroutine_threadsafe(
-        func(*args), _local.loop)  # type: concurrent.futures.Future[T_Retval]
-    return f.result()
+def _wrap_future(future: concurrent.futures.Future) -> asyncio.Future:
+    # Like asyncio.wrap_future(), but completions from worker threads are handed over in batches
+    # so that many completions only cost a single wake-up of the event loop
+    def cancel_source(asyncio_future: asyncio.Future) -> None:
+        if asyncio_future.cancelled():
+            future.cancel()
 
+    def source_done(future: concurrent.futures.Future) -> None:
+        batch.call_soon(_copy_future_state, future, asyncio_future)
 
-#
-# Async file I/O
-#
+    loop = get_running_loop()
+    asyncio_future = loop.create_future()
+    if future.done():
+        _copy_future_state(future, asyncio_future)
+    else:
+        batch = get_callback_batch(loop)
+        asyncio_future.add_done_callback(cancel_source)
+        future.add_done_callback(source_done)
 
-class AsyncFile:
-    def __init__(self, fp) -> None:
-        self._fp = fp
+    return asyncio_future
 
-    def __getattr__(self, name):
-        return getattr(self._fp, name)
 
-    async def __aenter__(self):
-        return self
+async def wait_future(future: concurrent.futures.Future, cancellable: bool = True,
+                      cancel_status: Optional[ThreadCancelStatus] = None) -> Any:
+    asyncio_future = _wrap_future(future)
+    if cancellable:
+        try:
+            return await asyncio_future
+        except asyncio.CancelledError:
+            if cancel_status is not None:
+                cancel_status.cancelled = True
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
+            raise
 
-    @async_generator
-    async def __aiter__(self):
-        while True:
-            line = await self.readline()
-            if line:
-                await yield_(line)
-            else:
-                break
+    # Shield the future from cancellation and deliver the cancellation only once it's done
+    cancel_exc = None
+    while not asyncio_future.done():
+        try:
+            await asyncio.shield(asyncio_future)
+        except asyncio.CancelledError as exc:
+            if cancel_status is not None:
+                cancel_status.cancelled = True
 
-    async def read(self, size: int = -1) -> Union[bytes, str]:
-        return await run_in_thread(self._fp.read, size)
+            cancel_exc = exc
 
-    async def read1(self, size: int = -1) -> Union[bytes, str]:
-        return await run_in_thread(self._fp.read1, size)
+    if cancel_exc is not None:
+        raise cancel_exc
 
-    async def readline(self) -> bytes:
-        return await run_in_thread(self._fp.readline)
+    return asyncio_future.result()
 
-    async def readlines(self) -> bytes:
-        return await run_in_thread(self._fp.readlines)
 
-    async def readinto(self, b: Union[bytes, memoryview]) -> bytes:
-        return await run_in_thread(self._fp.readinto, b)
+async def create_thread_cancel_status() -> ThreadCancelStatus:
+    return ThreadCancelStatus(await current_effective_deadline(), get_running_loop().time)
 
-    async def readinto1(self, b: Union[bytes, memoryview]) -> bytes:
-        return await run_in_thread(self._fp.readinto1, b)
 
-    async def write(self, b: bytes) -> None:
-        return await run_in_thread(self._fp.write, b)
+async def run_in_thread(func: Callable[..., T_Retval], *args, cancellable: bool = False,
+                        pool: Union[str, WorkerLane, None] = None) -> T_Retval:
+    def thread_worker():
+        with claim_worker_thread('asyncio', cancel_status):
+            _local.callback_batch = callback_batch
+            return func(*args)
+
+    check_cancelled()
+    callback_batch = get_callback_batch(get_running_loop())
+    cancel_status = await create_thread_cancel_status()
+    future = get_executor(pool).submit(thread_worker, target=func)
+    return await wait_future(future, cancellable, cancel_status)
 
-    async def writelines(self, lines: bytes) -> None:
-        return await run_in_thread(self._fp.writelines, lines)
 
-    async def truncate(self, size: Optional[int] = None) -> int:
-        return await run_in_thread(self._fp.truncate, size)
+def _start_task_from_thread(func: Callable[..., Coroutine[Any, Any, T_Retval]], args: tuple,
+                            future: concurrent.futures.Future) -> None:
+    def task_done(task: asyncio.Task) -> None:
+        if task.cancelled():
+            future.cancel()
+
+        if future.set_running_or_notify_cancel():
+            if task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(task.result())
+
+    try:
+        task = create_task(func(*args))
+    except BaseException as exc:
+        if future.set_running_or_notify_cancel():
+            future.set_exception(exc)
 
-    async def seek(self, offset: int, whence: Optional[int] = os.SEEK_SET) -> int:
-        return await run_in_thread(self._fp.seek, offset, whence)
+        if not isinstance(exc, Exception):
+            raise
+    else:
+        task.add_done_callback(task_done)
 
-    async def tell(self) -> int:
-        return await run_in_thread(self._fp.tell)
 
-    async def flush(self) -> None:
-        return await run_in_thread(self._fp.flush)
+def run_async_from_thread(func: Callable[..., Coroutine[Any, Any, T_Retval]], *args) -> T_Retval:
+    f = concurrent.futures.Future()  # type: concurrent.futures.Future[T_Retval]
+    _local.callback_batch.call_soon(_start_task_from_thread, func, args, f)
+    return f.result()
 
-    async def close(self) -> None:
-        return await run_in_thread(self._fp.close)
 
+#
+# Processes
+#
 
-async def aopen(*args, **kwargs):
-    fp = await run_in_thread(partial(open, *args, **kwargs))
-    return AsyncFile(fp)
+async def run_in_process(func: Callable[..., T_Retval], *args) -> T_Retval:
+    check_cancelled()
+    future = get_process_pool().submit(func, *args)
+    return await wait_future(future)
 
 
 #
@@ -517,8 +619,8 @@ class Socket(BaseSocket):
     async def _check_cancelled(self) -> None:
         check_cancelled()
 
-    def _run_in_thread(self, func: Callable, *args):
-        return run_in_thread(func, *args)
+    def _run_in_thread(self, func: Callable, *args, pool: Optional[str] = None):
+        return run_in_thread(func, *args, pool=pool)
 
 
 async def wait_socket_readable(sock: socket.SocketType) -> None:
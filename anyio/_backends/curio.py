@@ -1,6 +1,8 @@
+import concurrent.futures
+import threading
 import socket  # noqa: F401
-from functools import partial
-from typing import Callable, Set, Optional, Coroutine, Any, cast, Dict  # noqa: F401
+import time
+from typing import Callable, Set, Optional, Coroutine, Any, cast, Dict, Union  # noqa: F401
 
 import curio.io
 import curio.meta
@@ -9,7 +11,11 @@ import curio.ssl
 import curio.traps
 from async_generator import async_generator, asynccontextmanager, yield_
 
+from .._fileio import (  # noqa: F401
+    aopen, create_group_commit_writer, create_spooled_temporary_file)
 from .._networking import BaseSocket
+from .._processes import get_process_pool
+from .._threads import get_executor, WorkerLane, ThreadCancelStatus
 from .. import abc, T_Retval, claim_worker_thread, _local
 from ..exceptions import ExceptionGroup, CancelledError, ClosedResourceError
 
@@ -34,6 +40,35 @@ def run(func: Callable[..., T_Retval], *args, **curio_options) -> T_Retval:
         return cast(T_Retval, retval)
 
 
+class Runner(abc.Runner):
+    def __init__(self, **kernel_options) -> None:
+        self._kernel = curio.Kernel(**kernel_options)
+        self._closed = False
+
+    def run(self, func: Callable[..., T_Retval], *args) -> T_Retval:
+        async def wrapper():
+            nonlocal exception, retval
+            try:
+                retval = await func(*args)
+            except BaseException as exc:
+                exception = exc
+
+        if self._closed:
+            raise RuntimeError('This runner has been closed')
+
+        exception = retval = None
+        self._kernel.run(wrapper)
+        if exception is not None:
+            raise exception
+        else:
+            return cast(T_Retval, retval)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._kernel.run(shutdown=True)
+
+
 #
 # Miscellaneous functions
 #
@@ -261,30 +296,121 @@ async def create_task_group():
 # Threads
 #
 
-async def run_in_thread(func: Callable[..., T_Retval], *args) -> T_Retval:
+async def wait_future(future: concurrent.futures.Future) -> Any:
+    def set_done(f) -> None:
+        with lock:
+            if not done.done():
+                done.set_result(None)
+
+    # Wait on a proxy future that is resolved here on cancellation, so that an abandoned future
+    # finishing later cannot try to wake up a kernel that has already been closed
+    done = concurrent.futures.Future()  # type: concurrent.futures.Future
+    lock = threading.Lock()
+    future.add_done_callback(set_done)
+    try:
+        await curio.traps._future_wait(done)
+    except curio.CancelledError:
+        future.cancel()
+        with lock:
+            done.cancel()
+
+        raise
+
+    return future.result()
+
+
+class _ThreadCall:
+    """
+    Lets a worker thread ask the task waiting on it to run coroutine functions on its behalf.
+
+    Curio's ``AWAIT()`` only works in threads started by curio itself, so pooled worker threads
+    hand their requests to the waiting task instead.
+    """
+
+    __slots__ = 'wakeup', 'request'
+
+    def __init__(self) -> None:
+        self.wakeup = concurrent.futures.Future()  # type: concurrent.futures.Future
+        self.request = None
+
+    def wake(self, *args) -> None:
+        wakeup = self.wakeup
+        if not wakeup.done():
+            wakeup.set_result(None)
+
+    def run_async(self, func: Callable[..., Coroutine[Any, Any, T_Retval]], *args) -> T_Retval:
+        future = concurrent.futures.Future()  # type: concurrent.futures.Future
+        self.request = func, args, future
+        self.wake()
+        return future.result()
+
+    async def serve(self, future: concurrent.futures.Future) -> Any:
+        # Handle requests from the worker thread until it has finished
+        while True:
+            if self.request is not None:
+                func, args, request_future = self.request
+                self.request = None
+                try:
+                    retval = await func(*args)
+                except curio.CancelledError as exc:
+                    request_future.set_exception(exc)
+                    raise
+                except BaseException as exc:
+                    request_future.set_exception(exc)
+                else:
+                    request_future.set_result(retval)
+            elif future.done():
+                return future.result()
+            else:
+                await curio.traps._future_wait(self.wakeup)
+                self.wakeup = concurrent.futures.Future()
+
+
+async def create_thread_cancel_status() -> ThreadCancelStatus:
+    return ThreadCancelStatus(await current_effective_deadline(), time.monotonic)
+
+
+async def run_in_thread(func: Callable[..., T_Retval], *args, cancellable: bool = False,
+                        pool: Union[str, WorkerLane, None] = None) -> T_Retval:
     def thread_worker():
-        with claim_worker_thread('curio'):
+        with claim_worker_thread('curio', cancel_status):
+            _local.thread_call = thread_call
             return func(*args)
 
     await check_cancelled()
-    thread = await curio.spawn_thread(thread_worker)
+    thread_call = _ThreadCall()
+    cancel_status = await create_thread_cancel_status()
+    future = get_executor(pool).submit(thread_worker, target=func)
+    future.add_done_callback(thread_call.wake)
     try:
-        return await thread.join()
-    except curio.TaskError as exc:
-        raise exc.__cause__ from None
+        return await thread_call.serve(future)
+    except curio.CancelledError:
+        # Curio may have cancelled the wakeup future, and if the thread is being abandoned, the
+        # kernel must not be woken up when it finishes, so replace the wakeup future either way
+        cancel_status.cancelled = True
+        thread_call.wakeup = concurrent.futures.Future()
+        if cancellable:
+            future.cancel()
+            raise
+
+        async with curio.disable_cancellation():
+            await thread_call.serve(future)
+
+        raise
 
 
 def run_async_from_thread(func: Callable[..., T_Retval], *args) -> T_Retval:
-    return curio.AWAIT(func(*args))
+    return _local.thread_call.run_async(func, *args)
 
 
 #
-# Async file I/O
+# Processes
 #
 
-async def aopen(*args, **kwargs):
-    fp = await run_in_thread(partial(open, *args, **kwargs))
-    return curio.file.AsyncFile(fp)
+async def run_in_process(func: Callable[..., T_Retval], *args) -> T_Retval:
+    await check_cancelled()
+    future = get_process_pool().submit(func, *args)
+    return await wait_future(future)
 
 
 #
@@ -333,8 +459,8 @@ class Socket(BaseSocket):
     def _check_cancelled(self) -> Coroutine[Any, Any, None]:
         return check_cancelled()
 
-    def _run_in_thread(self, func: Callable, *args):
-        return run_in_thread(func, *args)
+    def _run_in_thread(self, func: Callable, *args, pool: Optional[str] = None):
+        return run_in_thread(func, *args, pool=pool)
 
 
 def wait_socket_readable(sock):
@@ -1,11 +1,17 @@
-from typing import Callable
+import concurrent.futures
+from typing import Callable, Optional, Any, Union
 
+import outcome
 import trio.hazmat
 from async_generator import async_generator, yield_, asynccontextmanager, aclosing
 
+from .._fileio import (  # noqa: F401
+    aopen, create_group_commit_writer, create_spooled_temporary_file)
 from .._networking import BaseSocket
+from .._processes import get_process_pool
+from .._threads import get_executor, WorkerLane, ThreadCancelStatus
 from .._utils import wrap_as_awaitable
-from .. import abc, claim_worker_thread, T_Retval, _local
+from .. import abc, claim_worker_thread, start_blocking_portal, T_Retval, _local
 from ..exceptions import ExceptionGroup, ClosedResourceError
 
 
@@ -16,6 +22,25 @@ from ..exceptions import ExceptionGroup, ClosedResourceError
 run = trio.run
 
 
+class Runner(abc.Runner):
+    def __init__(self, **trio_options) -> None:
+        # trio cannot resume its event loop once trio.run() has returned, so the event loop is
+        # kept running in another thread instead
+        self._portal = start_blocking_portal('trio', trio_options)
+        self._closed = False
+
+    def run(self, func: Callable[..., T_Retval], *args) -> T_Retval:
+        if self._closed:
+            raise RuntimeError('This runner has been closed')
+
+        return self._portal.call(func, *args)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self._portal.stop(cancel_remaining=True)
+
+
 #
 # Miscellaneous
 #
@@ -104,14 +129,54 @@ async def create_task_group():
 # Threads
 #
 
-async def run_in_thread(func: Callable[..., T_Retval], *args) -> T_Retval:
+async def wait_future(future: concurrent.futures.Future, cancellable: bool = True,
+                      cancel_status: Optional[ThreadCancelStatus] = None) -> Any:
+    def abort(raise_cancel):
+        nonlocal abandoned
+        if cancel_status is not None:
+            cancel_status.cancelled = True
+
+        if not cancellable:
+            return trio.hazmat.Abort.FAILED
+
+        abandoned = True
+        future.cancel()
+        return trio.hazmat.Abort.SUCCEEDED
+
+    def deliver_result():
+        if not abandoned:
+            trio.hazmat.reschedule(task, outcome.capture(future.result))
+
+    def report_result(future):
+        try:
+            trio_token.run_sync_soon(deliver_result)
+        except trio.RunFinishedError:
+            pass
+
+    abandoned = False
+    task = trio.hazmat.current_task()
+    trio_token = trio.hazmat.current_trio_token()
+    future.add_done_callback(report_result)
+    return await trio.hazmat.wait_task_rescheduled(abort)
+
+
+async def create_thread_cancel_status() -> ThreadCancelStatus:
+    return ThreadCancelStatus(trio.current_effective_deadline(),
+                              trio.hazmat.current_clock().current_time)
+
+
+async def run_in_thread(func: Callable[..., T_Retval], *args, cancellable: bool = False,
+                        pool: Union[str, WorkerLane, None] = None) -> T_Retval:
     def wrapper():
-        with claim_worker_thread('trio'):
+        with claim_worker_thread('trio', cancel_status):
             _local.portal = portal
             return func(*args)
 
+    await trio.hazmat.checkpoint_if_cancelled()
     portal = trio.BlockingTrioPortal()
-    return await trio.run_sync_in_worker_thread(wrapper)
+    cancel_status = await create_thread_cancel_status()
+    future = get_executor(pool).submit(wrapper, target=func)
+    return await wait_future(future, cancellable, cancel_status)
 
 
 def run_async_from_thread(func: Callable[..., T_Retval], *args) -> T_Retval:
@@ -119,10 +184,13 @@ def run_async_from_thread(func: Callable[..., T_Retval], *args) -> T_Retval:
 
 
 #
-# Async file I/O
+# Processes
 #
 
-aopen = trio.open_file
+async def run_in_process(func: Callable[..., T_Retval], *args) -> T_Retval:
+    await trio.hazmat.checkpoint_if_cancelled()
+    future = get_process_pool().submit(func, *args)
+    return await wait_future(future)
 
 
 #
@@ -144,8 +212,8 @@ class Socket(BaseSocket):
     def _check_cancelled(self):
         return trio.hazmat.checkpoint_if_cancelled()
 
-    def _run_in_thread(self, func: Callable, *args):
-        return run_in_thread(func, *args)
+    def _run_in_thread(self, func: Callable, *args, pool: Optional[str] = None):
+        return run_in_thread(func, *args, pool=pool)
 
 
 async def wait_socket_readable(sock):
@@ -0,0 +1,121 @@
+import errno
+import os
+import shutil
+from typing import Callable, List  # noqa: F401
+
+DEFAULT_CHUNK_SIZE = 8 * 1048576
+BUFFER_SIZE = 1048576
+
+# Errors that mean a copying method cannot be used with this pair of files
+UNSUPPORTED_ERRNOS = frozenset(
+    getattr(errno, name) for name in ('EXDEV', 'ENOSYS', 'EINVAL', 'EOPNOTSUPP', 'ENOTSUP')
+    if hasattr(errno, name))
+
+
+class FileCopier:
+    """
+    Copies the contents of a file in chunks, each of which is meant to be copied with a single
+    worker thread call.
+
+    The fastest available method is used: :func:`os.copy_file_range` lets the kernel (or the file
+    system) copy the data without moving it through user space, :func:`os.sendfile` at least
+    avoids copying it into Python objects, and reading and writing works everywhere. If a method
+    turns out not to work with the given files, the next one is tried.
+    """
+
+    __slots__ = '_src', '_dst', 'size', '_methods'
+
+    def __init__(self, src_fd: int, dst_fd: int, size: int) -> None:
+        self._src = src_fd
+        self._dst = dst_fd
+        self.size = size
+        self._methods = []  # type: List[Callable[[int, int], int]]
+        if hasattr(os, 'copy_file_range'):
+            self._methods.append(self._copy_file_range)
+        if hasattr(os, 'sendfile'):
+            self._methods.append(self._sendfile)
+
+        self._methods.append(self._copy_buffered)
+
+    @classmethod
+    def open(cls, src: str, dst: str) -> 'FileCopier':
+        binary = getattr(os, 'O_BINARY', 0)
+        src_fd = os.open(src, os.O_RDONLY | binary)
+        try:
+            src_stat = os.fstat(src_fd)
+            try:
+                if os.path.samestat(src_stat, os.stat(dst)):
+                    raise shutil.SameFileError(
+                        '{!r} and {!r} are the same file'.format(src, dst))
+            except FileNotFoundError:
+                pass
+
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | binary, 0o666)
+        except BaseException:
+            os.close(src_fd)
+            raise
+
+        return cls(src_fd, dst_fd, src_stat.st_size)
+
+    def copy_chunk(self, offset: int, size: int) -> int:
+        while True:
+            method = self._methods[0]
+            try:
+                copied = method(offset, size)
+            except OSError as exc:
+                if exc.errno not in UNSUPPORTED_ERRNOS or len(self._methods) == 1:
+                    raise
+            else:
+                # Some file systems make the zero-copy methods copy nothing at all, instead of
+                # failing; that looks just like the end of the file, unless it comes too early
+                if copied or offset >= self.size or len(self._methods) == 1:
+                    return copied
+
+            del self._methods[0]
+
+    def _copy_file_range(self, offset: int, size: int) -> int:
+        copied = 0
+        while copied < size:
+            position = offset + copied
+            count = os.copy_file_range(self._src, self._dst, size - copied, position, position)
+            if not count:
+                break
+
+            copied += count
+
+        return copied
+
+    def _sendfile(self, offset: int, size: int) -> int:
+        os.lseek(self._dst, offset, os.SEEK_SET)
+        copied = 0
+        while copied < size:
+            count = os.sendfile(self._dst, self._src, offset + copied, size - copied)
+            if not count:
+                break
+
+            copied += count
+
+        return copied
+
+    def _copy_buffered(self, offset: int, size: int) -> int:
+        os.lseek(self._src, offset, os.SEEK_SET)
+        os.lseek(self._dst, offset, os.SEEK_SET)
+        copied = 0
+        while copied < size:
+            data = os.read(self._src, min(size - copied, BUFFER_SIZE))
+            if not data:
+                break
+
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._dst, view):]
+
+            copied += len(data)
+
+        return copied
+
+    def close(self) -> None:
+        try:
+            os.close(self._dst)
+        finally:
+            os.close(self._src)
@@ -0,0 +1,733 @@
+import io
+import mmap
+import os
+import tempfile
+import threading
+from typing import Callable, List, Optional, Union  # noqa: F401
+
+from async_generator import async_generator, yield_
+
+from . import abc, create_lock, open_cancel_scope, run_in_thread
+from ._networking import IOV_MAX
+from ._threads import FILEIO_POOL, WorkerLane, get_worker_pool
+
+
+def prefault(mapping: mmap.mmap, start: int, end: int) -> None:
+    # Runs in a worker thread: make sure the pages in the given range are resident in memory, so
+    # that accessing them from the event loop thread does not block on disk I/O
+    start -= start % mmap.PAGESIZE
+    if end > start:
+        if hasattr(mapping, 'madvise') and hasattr(mmap, 'MADV_WILLNEED'):
+            mapping.madvise(mmap.MADV_WILLNEED, start, end - start)
+
+        for offset in range(start, end, mmap.PAGESIZE):
+            mapping[offset]
+
+
+class MemoryMappedFile(abc.MemoryMappedFile):
+    def __init__(self, mapping: Optional[mmap.mmap]) -> None:
+        self._mmap = mapping
+        self._view = memoryview(mapping if mapping is not None else b'')
+        self._position = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    @async_generator
+    async def __aiter__(self):
+        while True:
+            chunk = await self.read(1048576)
+            if not chunk:
+                break
+
+            await yield_(chunk)
+
+    async def view(self, offset: int, size: int = -1) -> memoryview:
+        end = len(self._view) if size < 0 else min(offset + size, len(self._view))
+        if self._mmap is not None and end > offset:
+            await run_in_thread(prefault, self._mmap, offset, end, pool=FILEIO_POOL)
+
+        return self._view[offset:end]
+
+    async def read(self, size: int = -1) -> memoryview:
+        data = await self.view(self._position, size)
+        self._position += len(data)
+        return data
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+
+        if offset < 0:
+            raise ValueError('negative seek position {}'.format(offset))
+
+        self._position = offset
+        return offset
+
+    def tell(self) -> int:
+        return self._position
+
+    def close(self) -> None:
+        self._view.release()
+        if self._mmap is not None:
+            mapping, self._mmap = self._mmap, None
+            try:
+                mapping.close()
+            except BufferError:
+                # Some of the returned slices are still in use; the mapping is then unmapped when
+                # the last of them is released
+                pass
+
+
+def read_lines(fp, max_lines: int) -> list:
+    # Iterating over a text file would disable tell() until the end of the file is reached
+    lines = []
+    for _ in range(max_lines):
+        line = fp.readline()
+        if not line:
+            break
+
+        lines.append(line)
+
+    return lines
+
+
+#
+# Positional I/O (runs in worker threads)
+#
+
+# Serializes the emulation of positional I/O on platforms without os.pread() and os.pwrite()
+_positional_lock = threading.Lock()
+
+
+def pread(fd: int, size: int, offset: int) -> bytes:
+    if hasattr(os, 'pread'):
+        return os.pread(fd, size, offset)
+
+    with _positional_lock:
+        position = os.lseek(fd, 0, os.SEEK_CUR)
+        try:
+            os.lseek(fd, offset, os.SEEK_SET)
+            return os.read(fd, size)
+        finally:
+            os.lseek(fd, position, os.SEEK_SET)
+
+
+def pwrite(fd: int, data, offset: int) -> int:
+    view = memoryview(data).cast('B')
+    written = 0
+    while written < len(view):
+        if hasattr(os, 'pwrite'):
+            written += os.pwrite(fd, view[written:], offset + written)
+        else:
+            with _positional_lock:
+                position = os.lseek(fd, 0, os.SEEK_CUR)
+                try:
+                    os.lseek(fd, offset + written, os.SEEK_SET)
+                    written += os.write(fd, view[written:])
+                finally:
+                    os.lseek(fd, position, os.SEEK_SET)
+
+    return written
+
+
+def preadv(fd: int, buffers: list, offset: int) -> int:
+    views = [memoryview(buffer).cast('B') for buffer in buffers]
+    total = 0
+    if hasattr(os, 'preadv'):
+        for i in range(0, len(views), IOV_MAX):
+            batch = views[i:i + IOV_MAX]
+            received = os.preadv(fd, batch, offset + total)
+            total += received
+            if received < sum(len(view) for view in batch):
+                break  # end of file
+    else:
+        for view in views:
+            data = pread(fd, len(view), offset + total)
+            view[:len(data)] = data
+            total += len(data)
+            if len(data) < len(view):
+                break  # end of file
+
+    return total
+
+
+def pwritev(fd: int, buffers: list, offset: int) -> int:
+    views = [memoryview(buffer).cast('B') for buffer in buffers]
+    total = 0
+    if hasattr(os, 'pwritev'):
+        for i in range(0, len(views), IOV_MAX):
+            batch = views[i:i + IOV_MAX]
+            written = os.pwritev(fd, batch, offset + total)
+            total += written
+            # Write whatever a short write left over, one buffer at a time
+            for view in batch:
+                if written >= len(view):
+                    written -= len(view)
+                else:
+                    total += pwrite(fd, view[written:], offset + total)
+                    written = 0
+    else:
+        for view in views:
+            total += pwrite(fd, view, offset + total)
+
+    return total
+
+
+class AsyncFile(abc.AsyncFile):
+    def __init__(self, fp, pool: Union[str, WorkerLane] = FILEIO_POOL) -> None:
+        self._fp = fp
+        self._pool = pool
+
+    def __getattr__(self, name):
+        return getattr(self._fp, name)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @async_generator
+    async def __aiter__(self):
+        while True:
+            line = await self.readline()
+            if line:
+                await yield_(line)
+            else:
+                break
+
+    @async_generator
+    async def iter_chunks(self, size: int = 65536):
+        while True:
+            chunk = await self.read(size)
+            if not chunk:
+                break
+
+            await yield_(chunk if isinstance(chunk, str) else memoryview(chunk))
+
+    @async_generator
+    async def iter_lines_batched(self, max_lines: int = 1000):
+        while True:
+            lines = await run_in_thread(read_lines, self._fp, max_lines, pool=self._pool)
+            if not lines:
+                break
+
+            await yield_(lines)
+
+    async def mmap(self) -> MemoryMappedFile:
+        def map_file():
+            try:
+                return mmap.mmap(self._fp.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                if os.fstat(self._fp.fileno()).st_size == 0:
+                    return None  # empty files cannot be mapped
+
+                raise
+
+        await self.flush()
+        mapping = await run_in_thread(map_file, pool=self._pool)
+        return MemoryMappedFile(mapping)
+
+    def _positional_fd(self) -> int:
+        if isinstance(self._fp, io.TextIOBase):
+            raise io.UnsupportedOperation('positional I/O is only supported in binary mode')
+
+        return self._fp.fileno()
+
+    async def pread(self, size: int, offset: int) -> bytes:
+        return await run_in_thread(pread, self._positional_fd(), size, offset, pool=self._pool)
+
+    async def pwrite(self, data: bytes, offset: int) -> int:
+        return await run_in_thread(pwrite, self._positional_fd(), data, offset, pool=self._pool)
+
+    async def preadv(self, buffers: List[Union[bytearray, memoryview]], offset: int) -> int:
+        return await run_in_thread(preadv, self._positional_fd(), buffers, offset,
+                                   pool=self._pool)
+
+    async def pwritev(self, buffers: List[Union[bytes, memoryview]], offset: int) -> int:
+        return await run_in_thread(pwritev, self._positional_fd(), buffers, offset,
+                                   pool=self._pool)
+
+    async def read(self, size: int = -1) -> Union[bytes, str]:
+        return await run_in_thread(self._fp.read, size, pool=self._pool)
+
+    async def read1(self, size: int = -1) -> Union[bytes, str]:
+        return await run_in_thread(self._fp.read1, size, pool=self._pool)
+
+    async def readline(self) -> bytes:
+        return await run_in_thread(self._fp.readline, pool=self._pool)
+
+    async def readlines(self) -> bytes:
+        return await run_in_thread(self._fp.readlines, pool=self._pool)
+
+    async def readinto(self, b: Union[bytes, memoryview]) -> bytes:
+        return await run_in_thread(self._fp.readinto, b, pool=self._pool)
+
+    async def readinto1(self, b: Union[bytes, memoryview]) -> bytes:
+        return await run_in_thread(self._fp.readinto1, b, pool=self._pool)
+
+    async def write(self, b: bytes) -> None:
+        return await run_in_thread(self._fp.write, b, pool=self._pool)
+
+    async def writelines(self, lines: bytes) -> None:
+        return await run_in_thread(self._fp.writelines, lines, pool=self._pool)
+
+    async def truncate(self, size: Optional[int] = None) -> int:
+        return await run_in_thread(self._fp.truncate, size, pool=self._pool)
+
+    async def seek(self, offset: int, whence: Optional[int] = os.SEEK_SET) -> int:
+        return await run_in_thread(self._fp.seek, offset, whence, pool=self._pool)
+
+    async def tell(self) -> int:
+        return await run_in_thread(self._fp.tell, pool=self._pool)
+
+    async def flush(self) -> None:
+        return await run_in_thread(self._fp.flush, pool=self._pool)
+
+    async def close(self) -> None:
+        return await run_in_thread(self._fp.close, pool=self._pool)
+
+    def _write_durably(self, data: Union[bytes, str]) -> None:
+        # Runs in a worker thread
+        self._fp.write(data)
+        self._fp.flush()
+        getattr(os, 'fdatasync', os.fsync)(self._fp.fileno())
+
+    async def _commit(self, data: Union[bytes, str]) -> None:
+        return await run_in_thread(self._write_durably, data, pool=self._pool)
+
+
+class BufferedAsyncFile(AsyncFile):
+    """
+    An asynchronous file that reads ahead and writes behind in large blocks.
+
+    Reads fetch ``buffer_size`` bytes (or characters) at a time from a worker thread, and lines
+    are split off in the event loop thread. Writes are collected in the event loop thread and only
+    handed to a worker thread once ``buffer_size`` has been reached, or when the file is flushed,
+    seeked, truncated or closed.
+    """
+
+    def __init__(self, fp, pool: Union[str, WorkerLane], buffer_size: int,
+                 newline: Optional[str]) -> None:
+        super().__init__(fp, pool)
+        self._buffer_size = buffer_size
+        self._text = isinstance(fp, io.TextIOBase)
+        self._empty = '' if self._text else b''
+        # Lines can only be split in the event loop thread if they end with a plain line feed
+        self._split_lines = not self._text or newline in (None, '\n')
+        self._terminator = '\n' if self._text else b'\n'
+        self._read_buffer = self._empty  # type: Union[bytes, str]
+        self._read_pos = 0
+        self._write_buffer = []  # type: List[Union[bytes, str]]
+        self._write_size = 0
+
+    @async_generator
+    async def __aiter__(self):
+        while True:
+            line = await self.readline()
+            if line:
+                await yield_(line)
+            else:
+                break
+
+    def _take_read_buffer(self, size: int = -1) -> Union[bytes, str]:
+        end = len(self._read_buffer) if size < 0 else self._read_pos + size
+        data = self._read_buffer[self._read_pos:end]
+        self._read_pos += len(data)
+        if self._read_pos >= len(self._read_buffer):
+            self._read_buffer = self._empty
+            self._read_pos = 0
+
+        return data
+
+    # The buffers are only ever changed in the event loop thread. Buffered writes and the amount
+    # of read-ahead data to skip back over are taken out of them before a worker thread call, and
+    # passed to it as arguments.
+
+    def _take_write_buffer(self) -> Union[bytes, str]:
+        data = self._empty.join(self._write_buffer)
+        self._write_buffer = []
+        self._write_size = 0
+        return data
+
+    def _take_unread_size(self) -> int:
+        # Discard the read-ahead data; the file position has to be moved back over it
+        unread = len(self._read_buffer) - self._read_pos
+        if unread:
+            if self._text:
+                raise io.UnsupportedOperation(
+                    'cannot reposition a text file while read-ahead data is buffered')
+
+            self._read_buffer = self._empty
+            self._read_pos = 0
+
+        return unread
+
+    def _sync(self, data: Union[bytes, str], unread: int, func: Callable, *args):
+        # Runs in a worker thread: bring the underlying file up to date before calling func
+        if data:
+            self._fp.write(data)
+        if unread:
+            self._fp.seek(-unread, os.SEEK_CUR)
+
+        return func(*args)
+
+    def _read_block(self, data: Union[bytes, str]) -> Union[bytes, str]:
+        # Runs in a worker thread
+        if data:
+            self._fp.write(data)
+
+        return self._fp.read(self._buffer_size)
+
+    async def _run_synced(self, func: Callable, *args):
+        unread = self._take_unread_size()
+        if self._write_buffer or unread:
+            return await run_in_thread(self._sync, self._take_write_buffer(), unread, func, *args,
+                                       pool=self._pool)
+        else:
+            return await run_in_thread(func, *args, pool=self._pool)
+
+    async def _fill_read_buffer(self) -> Union[bytes, str]:
+        return await run_in_thread(self._read_block, self._take_write_buffer(), pool=self._pool)
+
+    async def read(self, size: int = -1) -> Union[bytes, str]:
+        if size is None or size < 0:
+            data = self._take_read_buffer()
+            return data + await self._run_synced(self._fp.read)
+
+        data = self._take_read_buffer(size)
+        if len(data) == size:
+            return data
+        elif size - len(data) >= self._buffer_size:
+            return data + await self._run_synced(self._fp.read, size - len(data))
+
+        self._read_buffer = await self._fill_read_buffer()
+        return data + self._take_read_buffer(size - len(data))
+
+    async def read1(self, size: int = -1) -> Union[bytes, str]:
+        if self._read_buffer:
+            return self._take_read_buffer(size)
+
+        return await self._run_synced(self._fp.read1, size)
+
+    async def readline(self) -> Union[bytes, str]:
+        if not self._split_lines:
+            return await self._run_synced(self._fp.readline)
+
+        search_start = self._read_pos
+        while True:
+            index = self._read_buffer.find(self._terminator, search_start)
+            if index >= 0:
+                return self._take_read_buffer(index + 1 - self._read_pos)
+
+            block = await self._fill_read_buffer()
+            if not block:
+                return self._take_read_buffer()
+
+            search_start = len(self._read_buffer) - self._read_pos
+            self._read_buffer = self._read_buffer[self._read_pos:] + block
+            self._read_pos = 0
+
+    @async_generator
+    async def iter_chunks(self, size: int = 65536):
+        while self._read_buffer:
+            chunk = self._take_read_buffer(size)
+            await yield_(chunk if self._text else memoryview(chunk))
+
+        while True:
+            chunk = await self._run_synced(self._fp.read, size)
+            if not chunk:
+                break
+
+            await yield_(chunk if self._text else memoryview(chunk))
+
+    @async_generator
+    async def iter_lines_batched(self, max_lines: int = 1000):
+        if not self._split_lines:
+            while True:
+                lines = await self._run_synced(read_lines, self._fp, max_lines)
+                if not lines:
+                    break
+
+                await yield_(lines)
+
+            return
+
+        # Lines are already being split in the event loop thread, from blocks read ahead
+        lines = []
+        async for line in self:
+            lines.append(line)
+            if len(lines) == max_lines:
+                await yield_(lines)
+                lines = []
+
+        if lines:
+            await yield_(lines)
+
+    async def readlines(self) -> list:
+        lines = []
+        async for line in self:
+            lines.append(line)
+
+        return lines
+
+    async def readinto(self, b: Union[bytearray, memoryview]) -> int:
+        data = self._take_read_buffer(len(b))
+        if data:
+            b[:len(data)] = data
+            return len(data)
+
+        return await self._run_synced(self._fp.readinto, b)
+
+    async def readinto1(self, b: Union[bytearray, memoryview]) -> int:
+        data = self._take_read_buffer(len(b))
+        if data:
+            b[:len(data)] = data
+            return len(data)
+
+        return await self._run_synced(self._fp.readinto1, b)
+
+    async def write(self, b: Union[bytes, str]) -> int:
+        unread = self._take_unread_size()
+        if unread:
+            await run_in_thread(self._fp.seek, -unread, os.SEEK_CUR, pool=self._pool)
+
+        self._write_buffer.append(b)
+        self._write_size += len(b)
+        if self._write_size >= self._buffer_size:
+            await run_in_thread(self._fp.write, self._take_write_buffer(), pool=self._pool)
+
+        return len(b)
+
+    async def writelines(self, lines) -> None:
+        for line in lines:
+            await self.write(line)
+
+    async def truncate(self, size: Optional[int] = None) -> int:
+        return await self._run_synced(self._fp.truncate, size)
+
+    async def seek(self, offset: int, whence: Optional[int] = os.SEEK_SET) -> int:
+        return await self._run_synced(self._fp.seek, offset, whence)
+
+    async def tell(self) -> int:
+        return await self._run_synced(self._fp.tell)
+
+    async def flush(self) -> None:
+        return await self._run_synced(self._fp.flush)
+
+    async def close(self) -> None:
+        def close(data):
+            try:
+                if data:
+                    self._fp.write(data)
+            finally:
+                self._fp.close()
+
+        return await run_in_thread(close, self._take_write_buffer(), pool=self._pool)
+
+    async def _commit(self, data: Union[bytes, str]) -> None:
+        return await self._run_synced(self._write_durably, data)
+
+
+class SpooledTemporaryFile(AsyncFile, abc.SpooledTemporaryFile):
+    """
+    An asynchronous temporary file that is kept in memory until it grows past ``max_size``.
+
+    While the data is in memory, every operation runs directly in the event loop thread.
+    """
+
+    def __init__(self, max_size: int, mode: str, buffering: int, suffix: Optional[str],
+                 prefix: Optional[str], dir: Optional[str]) -> None:
+        if 'b' not in mode:
+            raise ValueError('only binary modes are supported')
+
+        super().__init__(io.BytesIO())
+        self._max_size = max_size
+        self._rolled = False
+        self._rollover_lock = create_lock()
+        self._tempfile_args = {'mode': mode, 'buffering': buffering, 'suffix': suffix,
+                               'prefix': prefix, 'dir': dir}
+
+    @property
+    def rolled(self) -> bool:
+        return self._rolled
+
+    def _create_tempfile(self, data: bytes, position: int):
+        # Runs in a worker thread
+        fp = tempfile.TemporaryFile(**self._tempfile_args)
+        try:
+            fp.write(data)
+            fp.seek(position)
+        except BaseException:
+            fp.close()
+            raise
+
+        return fp
+
+    async def rollover(self) -> None:
+        async with self._rollover_lock:
+            if not self._rolled:
+                fp = await run_in_thread(self._create_tempfile, self._fp.getvalue(),
+                                         self._fp.tell(), pool=self._pool)
+                self._fp, self._rolled = fp, True
+
+    async def _in_memory(self) -> bool:
+        # Wait for a rollover in progress to finish, as anything done to the in-memory file after
+        # its contents have been taken would be lost
+        if self._rollover_lock.locked():
+            async with self._rollover_lock:
+                pass
+
+        return not self._rolled
+
+    async def _fit(self, size: int) -> None:
+        # Move the data to disk if writing the given number of bytes would exceed the maximum size
+        if (await self._in_memory() and self._max_size and
+                self._fp.tell() + size > self._max_size):
+            await self.rollover()
+
+    @async_generator
+    async def iter_lines_batched(self, max_lines: int = 1000):
+        while True:
+            if await self._in_memory():
+                lines = read_lines(self._fp, max_lines)
+            else:
+                lines = await run_in_thread(read_lines, self._fp, max_lines, pool=self._pool)
+
+            if not lines:
+                break
+
+            await yield_(lines)
+
+    async def mmap(self) -> MemoryMappedFile:
+        await self.rollover()
+        return await super().mmap()
+
+    def _positional_fd(self) -> int:
+        if not self._rolled:
+            raise io.UnsupportedOperation(
+                'positional I/O requires the file to be rolled over to disk first')
+
+        return super()._positional_fd()
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._fp.read(size) if await self._in_memory() else await super().read(size)
+
+    async def read1(self, size: int = -1) -> bytes:
+        return self._fp.read1(size) if await self._in_memory() else await super().read1(size)
+
+    async def readline(self) -> bytes:
+        return self._fp.readline() if await self._in_memory() else await super().readline()
+
+    async def readlines(self) -> list:
+        return self._fp.readlines() if await self._in_memory() else await super().readlines()
+
+    async def readinto(self, b: Union[bytearray, memoryview]) -> int:
+        return self._fp.readinto(b) if await self._in_memory() else await super().readinto(b)
+
+    async def readinto1(self, b: Union[bytearray, memoryview]) -> int:
+        return self._fp.readinto1(b) if await self._in_memory() else await super().readinto1(b)
+
+    async def write(self, b: bytes) -> int:
+        await self._fit(len(b))
+        return self._fp.write(b) if not self._rolled else await super().write(b)
+
+    async def writelines(self, lines) -> None:
+        lines = list(lines)
+        await self._fit(sum(len(line) for line in lines))
+        return self._fp.writelines(lines) if not self._rolled else await super().writelines(lines)
+
+    async def truncate(self, size: Optional[int] = None) -> int:
+        return self._fp.truncate(size) if await self._in_memory() else await super().truncate(size)
+
+    async def seek(self, offset: int, whence: Optional[int] = os.SEEK_SET) -> int:
+        if await self._in_memory():
+            return self._fp.seek(offset, whence)
+
+        return await super().seek(offset, whence)
+
+    async def tell(self) -> int:
+        return self._fp.tell() if await self._in_memory() else await super().tell()
+
+    async def flush(self) -> None:
+        return self._fp.flush() if await self._in_memory() else await super().flush()
+
+    async def close(self) -> None:
+        return self._fp.close() if await self._in_memory() else await super().close()
+
+
+def create_spooled_temporary_file(max_size: int = 0, mode: str = 'w+b', buffering: int = -1,
+                                  suffix: Optional[str] = None, prefix: Optional[str] = None,
+                                  dir: Optional[str] = None) -> SpooledTemporaryFile:
+    return SpooledTemporaryFile(max_size, mode, buffering, suffix, prefix, dir)
+
+
+class CommitBatch:
+    __slots__ = 'data', 'committed', 'error'
+
+    def __init__(self) -> None:
+        self.data = []  # type: List[Union[bytes, str]]
+        self.committed = False
+        self.error = None  # type: Optional[BaseException]
+
+
+class GroupCommitWriter(abc.GroupCommitWriter):
+    def __init__(self, file: AsyncFile) -> None:
+        self._file = file
+        self._batch = CommitBatch()
+        self._commit_lock = create_lock()
+
+    async def write(self, data: Union[bytes, str]) -> None:
+        batch = self._batch
+        batch.data.append(data)
+
+        # Whoever gets the lock first commits everything collected so far
+        acquired = False
+        try:
+            async with self._commit_lock:
+                acquired = True
+                if not batch.committed:
+                    self._batch = CommitBatch()
+                    try:
+                        async with open_cancel_scope(shield=True):
+                            await self._file._commit(batch.data[0][:0].join(batch.data))
+                    except Exception as exc:
+                        batch.error = exc
+                    finally:
+                        batch.committed = True
+        except BaseException:
+            if not acquired and batch is self._batch:
+                # The batch has not been started yet, so the data can still be taken back
+                index = next(i for i, item in enumerate(batch.data) if item is data)
+                del batch.data[index]
+
+            raise
+
+        if batch.error is not None:
+            raise batch.error
+
+
+def create_group_commit_writer(file: AsyncFile) -> GroupCommitWriter:
+    return GroupCommitWriter(file)
+
+
+async def aopen(file, mode: str = 'r', buffering: int = -1, encoding: Optional[str] = None,
+                errors: Optional[str] = None, newline: Optional[str] = None, closefd: bool = True,
+                opener: Optional[Callable] = None, async_buffer_size: int = 0,
+                pinned: bool = False) -> AsyncFile:
+    fp = await run_in_thread(open, file, mode, buffering, encoding, errors, newline, closefd,
+                             opener, pool=FILEIO_POOL)
+    pool = WorkerLane(get_worker_pool(FILEIO_POOL)) if pinned else FILEIO_POOL
+    if async_buffer_size > 0:
+        return BufferedAsyncFile(fp, pool, async_buffer_size, newline)
+    else:
+        return AsyncFile(fp, pool)
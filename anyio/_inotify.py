@@ -0,0 +1,155 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+from enum import Enum
+from typing import Dict, List, Optional, Tuple  # noqa: F401
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+READ_SIZE = 65536
+
+_libc = None  # type: Optional[ctypes.CDLL]
+
+
+class FileChange(Enum):
+    """The kind of change reported by :func:`~anyio.watch_path`."""
+
+    added = 'added'
+    modified = 'modified'
+    deleted = 'deleted'
+
+
+def merge_change(previous: Optional[FileChange], change: FileChange) -> Optional[FileChange]:
+    # Combine two changes to the same path into the one change that has the same end result
+    if previous is None:
+        return change
+    elif change is FileChange.deleted:
+        return None if previous is FileChange.added else FileChange.deleted
+    elif previous is FileChange.deleted:
+        return FileChange.modified  # deleted and then created again
+    else:
+        return previous  # added or modified, and then modified
+
+
+def get_change(mask: int) -> FileChange:
+    if mask & (IN_CREATE | IN_MOVED_TO):
+        return FileChange.added
+    elif mask & (IN_DELETE | IN_MOVED_FROM | IN_DELETE_SELF | IN_MOVE_SELF):
+        return FileChange.deleted
+    else:
+        return FileChange.modified
+
+
+def get_libc() -> ctypes.CDLL:
+    global _libc
+    if _libc is None:
+        if not sys.platform.startswith('linux'):
+            raise NotImplementedError('watching paths is only supported on Linux')
+
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+
+    return _libc
+
+
+def check_call(result: int, path: Optional[str] = None) -> int:
+    if result < 0:
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error), path)
+
+    return result
+
+
+class Inotify:
+    """A non-blocking inotify instance, and the paths of the directories and files it watches."""
+
+    def __init__(self) -> None:
+        libc = get_libc()
+        self._fd = check_call(libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC))
+        self._paths = {}  # type: Dict[int, str]
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def add_watch(self, path: str) -> None:
+        wd = check_call(get_libc().inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK),
+                        path)
+        self._paths[wd] = path
+
+    def add_watches(self, path: str, recursive: bool, missing_ok: bool = False) -> List[str]:
+        # Runs in a worker thread; returns the paths of any files found in subdirectories
+        try:
+            self.add_watch(path)
+        except OSError as exc:
+            if exc.errno != errno.ENOENT or not missing_ok:
+                raise
+
+            return []
+
+        found = []  # type: List[str]
+        if recursive and os.path.isdir(path):
+            for dirpath, dirnames, filenames in os.walk(path):
+                for name in dirnames:
+                    try:
+                        self.add_watch(os.path.join(dirpath, name))
+                    except OSError as exc:
+                        if exc.errno != errno.ENOENT:
+                            raise
+
+                found.extend(os.path.join(dirpath, name) for name in dirnames + filenames)
+
+        return found
+
+    def read_events(self) -> List[Tuple[str, int]]:
+        """
+        Read all the events currently available without blocking.
+
+        :return: a list of (path, mask) tuples
+        :raises OverflowError: if the kernel has dropped events
+
+        """
+        events = []
+        while True:
+            try:
+                data = os.read(self._fd, READ_SIZE)
+            except BlockingIOError:
+                return events
+
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    raise OverflowError('the inotify event queue overflowed')
+
+                if mask & IN_IGNORED:
+                    self._paths.pop(wd, None)
+                    continue
+
+                path = self._paths.get(wd)
+                if path is not None:
+                    if name:
+                        path = os.path.join(path, os.fsdecode(name))
+
+                    events.append((path, mask))
+
+    def close(self) -> None:
+        os.close(self._fd)
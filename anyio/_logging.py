@@ -0,0 +1,144 @@
+import copy
+import logging
+import threading
+from collections import deque
+from typing import TYPE_CHECKING, List, Optional  # noqa: F401
+
+from ._threads import DEFAULT_POOL, get_worker_pool
+
+if TYPE_CHECKING:
+    from typing import Deque  # noqa: F401 (not available before Python 3.5.4)
+
+
+class AsyncLogHandler(logging.Handler):
+    """
+    A logging handler that hands log records over to another handler in a worker thread.
+
+    Emitting a record only formats its message and adds it to a buffer, so logging from the event
+    loop thread never waits for a slow disk or network. A single worker thread call at a time
+    passes all the buffered records to the target handler, so records are handled in order, and a
+    burst of records costs a single thread hand-off.
+
+    If the buffer is full, new records are dropped (and the number of dropped records is reported
+    to the target handler later), unless ``block`` is ``True``, in which case the emitting thread
+    waits until there is room in the buffer. Records emitted by the target handler itself (from
+    the worker thread) are always dropped when the buffer is full, as waiting for room would
+    deadlock.
+
+    Like with :class:`logging.handlers.QueueHandler`, the message of each record (including any
+    exception traceback) is formatted in the emitting thread with this handler's formatter, and
+    the target handler's formatter is then applied to the result.
+
+    :param target: the handler to pass the records to
+    :param capacity: maximum number of records to hold in the buffer
+    :param block: ``True`` to block the emitting thread when the buffer is full, ``False`` to drop
+        the record
+    :param pool: name of the worker thread pool to use
+    :raises ValueError: if ``capacity`` is less than 1
+    """
+
+    def __init__(self, target: logging.Handler, capacity: int = 10000, block: bool = False,
+                 pool: str = DEFAULT_POOL) -> None:
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+
+        super().__init__()
+        self.target = target
+        self.capacity = capacity
+        self.block = block
+        self._worker_pool = get_worker_pool(pool)
+        self._condition = threading.Condition(threading.Lock())
+        self._records = deque()  # type: Deque[logging.LogRecord]
+        self._dropped = 0
+        self._writing = False
+        self._writer_thread = None  # type: Optional[int]
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same as QueueHandler.prepare(): make the record safe to handle in another thread
+        message = self.format(record)
+        record = copy.copy(record)
+        record.message = message
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            record = self.prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+
+        with self._condition:
+            while len(self._records) >= self.capacity:
+                # The writer thread must not wait for itself to make room
+                if not self.block or threading.get_ident() == self._writer_thread:
+                    self._dropped += 1
+                    return
+
+                self._condition.wait()
+
+            self._records.append(record)
+            if self._writing:
+                return
+
+            self._writing = True
+
+        # Submit outside the lock, as the pool's saturation callback may log something itself
+        self._worker_pool.submit(self._handle_records, target=self.target.handle)
+
+    def _handle_records(self) -> None:
+        # Runs in a worker thread
+        with self._condition:
+            self._writer_thread = threading.get_ident()
+
+        while True:
+            with self._condition:
+                records = list(self._records)  # type: List[logging.LogRecord]
+                self._records.clear()
+                dropped, self._dropped = self._dropped, 0
+                if not records and not dropped:
+                    self._writing = False
+                    self._writer_thread = None
+                    self._condition.notify_all()
+                    return
+
+                self._condition.notify_all()
+
+            if dropped:
+                records.insert(0, logging.makeLogRecord({
+                    'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                    'msg': '{} log records were dropped because the buffer was full'.format(
+                        dropped)}))
+
+            for record in records:
+                try:
+                    self.target.handle(record)
+                except Exception:
+                    self.handleError(record)
+
+            try:
+                self.target.flush()
+            except Exception:
+                self.handleError(records[-1])
+
+    def flush(self) -> None:
+        """
+        Wait until all the buffered records have been passed to the target handler.
+
+        This blocks the calling thread, so to flush from the event loop thread, run it in a worker
+        thread with ``await run_in_thread(handler.flush)``.
+
+        """
+        with self._condition:
+            while self._writing:
+                self._condition.wait()
+
+    def close(self) -> None:
+        try:
+            self.flush()
+            self.target.close()
+        finally:
+            super().close()
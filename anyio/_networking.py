@@ -1,16 +1,35 @@
 import errno
+import os
 import socket
 import ssl
 from abc import ABCMeta, abstractmethod
 from ipaddress import ip_address
-from typing import Union, Tuple, Any, Optional, Callable, Dict, List, cast
+from typing import Union, Tuple, Any, Optional, Callable, Dict, Iterable, List, cast
 
 from async_generator import async_generator, yield_
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 from anyio import abc
+from anyio._threads import DNS_POOL
 from anyio.abc import IPAddressType
 from anyio.exceptions import DelimiterNotFound, IncompleteRead, TLSRequired, ClosedResourceError
 
+SPLICE_SIZE = 65536  # default capacity of a pipe on Linux
+TRANSFER_CHUNK_SIZE = 65536
+IOV_MAX = 1024  # the smallest limit on the number of buffers per call among supported platforms
+RECEIVE_BUFFER_SIZE = 65536  # initial size of the receive buffer of a stream
+MAX_IDLE_BUFFER_SIZE = 1048576  # larger receive buffers are released once they become empty
+
+
+def can_splice_into(fd: int) -> bool:
+    # os.splice() refuses to write into files opened in append mode
+    return (hasattr(os, 'splice') and fcntl is not None
+            and not fcntl.fcntl(fd, fcntl.F_GETFL) & os.O_APPEND)
+
 
 class BaseSocket(metaclass=ABCMeta):
     __slots__ = '_raw_socket'
@@ -39,7 +58,7 @@ class BaseSocket(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    async def _run_in_thread(self, func: Callable, *args):
+    async def _run_in_thread(self, func: Callable, *args, pool: Optional[str] = None):
         pass
 
     async def accept(self):
@@ -68,7 +87,7 @@ class BaseSocket(metaclass=ABCMeta):
                 return
 
         # In all other cases, do this in a worker thread to avoid blocking the event loop thread
-        await self._run_in_thread(self._raw_socket.bind, address)
+        await self._run_in_thread(self._raw_socket.bind, address, pool=DNS_POOL)
 
     async def close(self):
         await self._notify_close()
@@ -107,6 +126,9 @@ class BaseSocket(metaclass=ABCMeta):
                 await self._wait_readable()
             except ssl.SSLWantWriteError:
                 await self._wait_writable()
+            except ssl.SSLEOFError:
+                self._raw_socket.close()
+                raise
 
     async def recvfrom(self, size: int, *, flags: int = 0) -> Tuple[bytes, Any]:
         await self._check_cancelled()
@@ -143,11 +165,11 @@ class BaseSocket(metaclass=ABCMeta):
             return self._raw_socket.sendto(data, flags, addr)
 
     async def sendall(self, data: bytes, *, flags: int = 0) -> None:
-        to_send = len(data)
-        while to_send > 0:
+        view = memoryview(data).cast('B')
+        while view:
             await self._check_cancelled()
             try:
-                sent = self._raw_socket.send(data, flags)
+                sent = self._raw_socket.send(view, flags)
             except (BlockingIOError, ssl.SSLWantWriteError):
                 await self._wait_writable()
             except ssl.SSLWantReadError:
@@ -156,7 +178,86 @@ class BaseSocket(metaclass=ABCMeta):
                 self._raw_socket.close()
                 raise
             else:
-                to_send -= sent
+                view = view[sent:]
+
+    async def sendall_many(self, buffers: Iterable[bytes]) -> None:
+        views = [memoryview(buffer).cast('B') for buffer in buffers]
+        raw_socket = self._raw_socket
+        if isinstance(raw_socket, ssl.SSLSocket) or not hasattr(raw_socket, 'sendmsg'):
+            # The data has to be copied for encryption anyway, so send it as one piece
+            return await self.sendall(b''.join(views))
+
+        views = [view for view in views if view]
+        index = 0
+        while index < len(views):
+            await self._check_cancelled()
+            try:
+                sent = raw_socket.sendmsg(views[index:index + IOV_MAX])
+            except BlockingIOError:
+                await self._wait_writable()
+            else:
+                # Skip the buffers that were sent completely, and the sent part of the next one
+                while sent:
+                    size = len(views[index])
+                    if sent < size:
+                        views[index] = views[index][sent:]
+                        break
+
+                    sent -= size
+                    index += 1
+
+    @property
+    def _zero_copy_possible(self) -> bool:
+        # The kernel cannot encrypt or decrypt the data for us
+        return not isinstance(self._raw_socket, ssl.SSLSocket)
+
+    async def sendfile(self, fd: int, offset: int, count: int) -> int:
+        # Send data straight from a file descriptor with os.sendfile()
+        sent_total = 0
+        while sent_total < count:
+            await self._check_cancelled()
+            try:
+                sent = os.sendfile(self._raw_socket.fileno(), fd, offset + sent_total,
+                                   count - sent_total)
+            except BlockingIOError:
+                await self._wait_writable()
+            else:
+                if not sent:
+                    break  # end of file
+
+                sent_total += sent
+
+        return sent_total
+
+    async def splice_into(self, fd: int, offset: int, count: Optional[int]) -> int:
+        # Move received data straight into a file descriptor with os.splice(), via a pipe
+        read_fd, write_fd = os.pipe()
+        try:
+            received = 0
+            while count is None or received < count:
+                await self._check_cancelled()
+                size = SPLICE_SIZE if count is None else min(count - received, SPLICE_SIZE)
+                try:
+                    spliced = os.splice(self._raw_socket.fileno(), write_fd, size,
+                                        flags=os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK)
+                except BlockingIOError:
+                    await self._wait_readable()
+                    continue
+
+                if not spliced:
+                    break  # end of stream
+
+                # Empty the pipe before the next cancellation point so no data can get lost
+                while spliced:
+                    moved = os.splice(read_fd, fd, spliced, offset_dst=offset + received,
+                                      flags=os.SPLICE_F_MOVE)
+                    received += moved
+                    spliced -= moved
+
+            return received
+        finally:
+            os.close(read_fd)
+            os.close(write_fd)
 
     async def start_tls(self, context: ssl.SSLContext,
                         server_hostname: Optional[str] = None,
@@ -204,7 +305,10 @@ class SocketStream(abc.SocketStream):
         self._ssl_context = ssl_context
         self._server_hostname = server_hostname
         self._tls_standard_compatible = tls_standard_compatible
-        self._buffer = b''
+
+        # Data that has been received but not consumed yet: _buffer[_buffer_start:_buffer_end]
+        self._buffer = bytearray()
+        self._buffer_start = self._buffer_end = 0
 
     async def close(self):
         from . import move_on_after
@@ -216,55 +320,126 @@ class SocketStream(abc.SocketStream):
         finally:
             await self._socket.close()
 
+    def _advance_buffer(self, start: int) -> None:
+        # Throw away the buffered data before the given index
+        if start == self._buffer_end:
+            self._buffer_start = self._buffer_end = 0
+            if len(self._buffer) > MAX_IDLE_BUFFER_SIZE:
+                self._buffer = bytearray()
+        else:
+            self._buffer_start = start
+
+    def _consume_buffer(self, stop: int, skip: int = 0) -> bytes:
+        # Remove the buffered data up to the stop index (and skip bytes more that are thrown away)
+        data = bytes(self._buffer[self._buffer_start:stop])
+        self._advance_buffer(stop + skip)
+        return data
+
+    def _consume_buffer_into(self, target: memoryview) -> int:
+        # Move as much of the buffered data as fits into the target memoryview
+        start = self._buffer_start
+        count = min(self._buffer_end - start, len(target))
+        if count:
+            with memoryview(self._buffer) as view, view[start:start + count] as data:
+                target[:count] = data
+
+            self._advance_buffer(start + count)
+
+        return count
+
+    def _reserve_buffer(self, nbytes: int) -> None:
+        # Make room for nbytes more data after the end of the buffered data
+        if len(self._buffer) - self._buffer_end >= nbytes:
+            return
+
+        # Move the buffered data to the start of the buffer, and grow the buffer if that was not
+        # enough
+        buffered = self._buffer_end - self._buffer_start
+        if self._buffer_start:
+            self._buffer[:buffered] = self._buffer[self._buffer_start:self._buffer_end]
+            self._buffer_start, self._buffer_end = 0, buffered
+
+        missing = buffered + nbytes - len(self._buffer)
+        if missing > 0:
+            self._buffer.extend(bytes(max(missing, len(self._buffer), RECEIVE_BUFFER_SIZE)))
+
+    async def _fill_buffer(self, max_bytes: int) -> None:
+        # Receive up to max_bytes directly into the buffer
+        self._reserve_buffer(max_bytes)
+        end = self._buffer_end
+        with memoryview(self._buffer) as view, view[end:end + max_bytes] as free_space:
+            received = await self._socket.recv_into(free_space, max_bytes)
+
+        if not received:
+            raise IncompleteRead
+
+        self._buffer_end = end + received
+
     @property
     def buffered_data(self) -> bytes:
-        return self._buffer
+        return bytes(self._buffer[self._buffer_start:self._buffer_end])
 
     async def receive_some(self, max_bytes: int) -> bytes:
-        if self._buffer:
-            data, self._buffer = self._buffer[:max_bytes], self._buffer[max_bytes:]
-            return data
+        buffered = self._buffer_end - self._buffer_start
+        if buffered:
+            return self._consume_buffer(self._buffer_start + min(buffered, max_bytes))
 
         return await self._socket.recv(max_bytes)
 
     async def receive_exactly(self, nbytes: int) -> bytes:
-        bytes_left = nbytes - len(self._buffer)
-        while bytes_left > 0:
-            chunk = await self._socket.recv(nbytes)
-            if not chunk:
-                raise IncompleteRead
-
-            self._buffer += chunk
-            bytes_left -= len(chunk)
+        buffered = self._buffer_end - self._buffer_start
+        if buffered >= nbytes:
+            return self._consume_buffer(self._buffer_start + nbytes)
+
+        result = bytearray(nbytes)
+        await self.receive_exactly_into(result)
+        return bytes(result)
+
+    async def receive_into(self, buffer) -> int:
+        with memoryview(buffer) as view, view.cast('B') as target:
+            if self._buffer_end > self._buffer_start:
+                return self._consume_buffer_into(target)
+
+            return await self._socket.recv_into(target, len(target))
+
+    async def receive_exactly_into(self, buffer) -> None:
+        with memoryview(buffer) as view, view.cast('B') as target:
+            # Receive whatever is missing straight into the target, reading no more than that
+            nbytes = len(target)
+            received = self._consume_buffer_into(target)
+            try:
+                while received < nbytes:
+                    count = await self._socket.recv_into(target[received:], nbytes - received)
+                    if not count:
+                        raise IncompleteRead
 
-        result = self._buffer[:nbytes]
-        self._buffer = self._buffer[nbytes:]
-        return result
+                    received += count
+            except BaseException:
+                # Keep the partial data buffered, so it can still be received
+                self._reserve_buffer(received)
+                self._buffer[:received] = target[:received]
+                self._buffer_end = received
+                raise
 
     async def receive_until(self, delimiter: bytes, max_size: int) -> bytes:
         delimiter_size = len(delimiter)
-        offset = 0
+        offset = 0  # how much of the buffered data has already been searched
         while True:
-            # Check if the delimiter can be found in the current buffer
-            index = self._buffer.find(delimiter, offset)
+            # Check if the delimiter can be found within the first max_size bytes of the buffer
+            start, end = self._buffer_start, self._buffer_end
+            stop = start + max_size
+            index = self._buffer.find(delimiter, start + offset, end if end < stop else stop)
             if index >= 0:
-                found = self._buffer[:index]
-                self._buffer = self._buffer[index + len(delimiter):]
-                return found
+                return self._consume_buffer(index, delimiter_size)
 
             # Check if the buffer is already at or over the limit
-            if len(self._buffer) >= max_size:
+            buffered = end - start
+            if buffered >= max_size:
                 raise DelimiterNotFound(max_size)
 
-            # Read more data into the buffer from the socket
-            read_size = max_size - len(self._buffer)
-            data = await self._socket.recv(read_size)
-            if not data:
-                raise IncompleteRead
-
-            # Move the offset forward and add the new data to the buffer
-            offset = max(len(self._buffer) - delimiter_size + 1, 0)
-            self._buffer += data
+            # Move the offset forward and read more data into the buffer from the socket
+            offset = max(buffered - delimiter_size + 1, 0)
+            await self._fill_buffer(RECEIVE_BUFFER_SIZE)
 
     @async_generator
     async def receive_chunks(self, max_size: int):
@@ -281,7 +456,7 @@ class SocketStream(abc.SocketStream):
             try:
                 chunk = await self.receive_until(delimiter, max_chunk_size)
             except IncompleteRead:
-                if self._buffer:
+                if self._buffer_end > self._buffer_start:
                     raise
                 else:
                     break
@@ -291,6 +466,68 @@ class SocketStream(abc.SocketStream):
     async def send_all(self, data: bytes) -> None:
         return await self._socket.sendall(data)
 
+    async def send_all_many(self, buffers: Iterable[bytes]) -> None:
+        return await self._socket.sendall_many(buffers)
+
+    async def send_file(self, file: abc.AsyncFile, offset: int = 0,
+                        count: Optional[int] = None) -> int:
+        await file.flush()
+        if count is None:
+            count = max(os.fstat(file.fileno()).st_size - offset, 0)
+
+        if hasattr(os, 'sendfile') and self._socket._zero_copy_possible:
+            sent = await self._socket.sendfile(file.fileno(), offset, count)
+        else:
+            sent = 0
+            await file.seek(offset)
+            while sent < count:
+                data = await file.read(min(count - sent, TRANSFER_CHUNK_SIZE))
+                if not data:
+                    break
+
+                view = memoryview(data)
+                while view:
+                    view = view[await self._socket.send(view):]
+
+                sent += len(data)
+
+        await file.seek(offset + sent)
+        return sent
+
+    async def receive_into_file(self, file: abc.AsyncFile, count: Optional[int] = None) -> int:
+        received = 0
+        buffered = self._buffer_end - self._buffer_start
+        if buffered:
+            data = self._consume_buffer(self._buffer_start + (
+                buffered if count is None else min(buffered, count)))
+            await file.write(data)
+            received += len(data)
+
+        remaining = None if count is None else count - received
+        if remaining == 0:
+            return received
+
+        if self._socket._zero_copy_possible and can_splice_into(file.fileno()):
+            await file.flush()
+            offset = await file.tell()
+            spliced = await self._socket.splice_into(file.fileno(), offset, remaining)
+            await file.seek(offset + spliced)
+            received += spliced
+        else:
+            while remaining is None or remaining > 0:
+                size = TRANSFER_CHUNK_SIZE if remaining is None else min(remaining,
+                                                                         TRANSFER_CHUNK_SIZE)
+                data = await self._socket.recv(size)
+                if not data:
+                    break
+
+                await file.write(data)
+                received += len(data)
+                if remaining is not None:
+                    remaining -= len(data)
+
+        return received
+
     #
     # TLS methods
     #
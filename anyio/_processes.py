@@ -0,0 +1,139 @@
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, TypeVar  # noqa: F401
+
+from ._threads import get_callable_name
+
+DEFAULT_MAX_PROCESSES = os.cpu_count() or 1
+
+T_Retval = TypeVar('T_Retval')
+
+_pool = None  # type: Optional[ProcessPoolExecutor]
+_max_processes = DEFAULT_MAX_PROCESSES
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(_max_processes)
+
+    return _pool
+
+
+def get_max_processes() -> int:
+    return _max_processes
+
+
+def set_max_processes(value: int) -> None:
+    global _pool, _max_processes
+    if value < 1:
+        raise ValueError('max_processes must be at least 1')
+
+    with _pool_lock:
+        _max_processes = value
+        old_pool, _pool = _pool, None
+
+    # New calls go to a fresh pool. The old one must be shut down properly, as an abandoned pool
+    # breaks the executor's cleanup at interpreter exit.
+    if old_pool is not None:
+        old_pool.shutdown(wait=True)
+
+
+#
+# Adaptive routing between worker threads and processes
+#
+
+thread_time = getattr(time, 'thread_time', None)  # not available on Python < 3.7
+
+PROFILE_SAMPLE_CALLS = 5
+CPU_BOUND_RATIO = 0.8
+MIN_PROCESS_RUN_TIME = 0.005
+SMOOTHING_FACTOR = 0.2
+
+
+class CallProfile:
+    """
+    Learns whether calls to a callable hold the GIL for most of their run time.
+
+    Calls are measured while they run in worker threads. If the thread CPU time of a call is close
+    to its wall clock time, the call spent its time running Python code (or C code that holds the
+    GIL) rather than waiting on I/O, so running it in a worker thread gains nothing.
+    """
+
+    __slots__ = '_lock', 'calls', 'cpu_ratio', 'run_time', 'picklable'
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.cpu_ratio = 0.0
+        self.run_time = 0.0
+        self.picklable = None  # type: Optional[bool]
+
+    @property
+    def cpu_bound(self) -> bool:
+        return (self.calls >= PROFILE_SAMPLE_CALLS and self.cpu_ratio >= CPU_BOUND_RATIO and
+                self.run_time >= MIN_PROCESS_RUN_TIME)
+
+    def use_process(self, func: Callable) -> bool:
+        if thread_time is None or not self.cpu_bound:
+            return False
+
+        if self.picklable is None:
+            try:
+                pickle.dumps(func)
+            except Exception:
+                self.picklable = False
+            else:
+                self.picklable = True
+
+        return self.picklable
+
+    def run(self, func: Callable[..., T_Retval], *args) -> T_Retval:
+        if thread_time is None:
+            return func(*args)
+
+        global _profiled_calls
+        with _profile_lock:
+            _profiled_calls += 1
+            concurrent_calls = _profiled_calls
+
+        start_cpu, start = thread_time(), time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            run_time = time.monotonic() - start
+            cpu_time = thread_time() - start_cpu
+            with _profile_lock:
+                concurrent_calls = (concurrent_calls + _profiled_calls) / 2
+                _profiled_calls -= 1
+
+            # Threads running at the same time share the GIL, so a GIL bound call only gets its
+            # share of the CPU time; scale by the number of measured calls running alongside it
+            cpu_ratio = min(cpu_time * concurrent_calls / run_time, 1.0) if run_time > 0 else 0.0
+            with self._lock:
+                # Plain averages over the sample calls (so that a single disturbed measurement
+                # cannot dominate), and exponential moving averages after that
+                weight = max(1 / (self.calls + 1), SMOOTHING_FACTOR)
+                self.cpu_ratio += weight * (cpu_ratio - self.cpu_ratio)
+                self.run_time += weight * (run_time - self.run_time)
+                self.calls += 1
+
+
+_call_profiles = {}  # type: Dict[str, CallProfile]
+_profile_lock = threading.Lock()
+_profiled_calls = 0
+
+
+def get_call_profile(func: Callable) -> CallProfile:
+    key = get_callable_name(func)
+    try:
+        return _call_profiles[key]
+    except KeyError:
+        with _profile_lock:
+            return _call_profiles.setdefault(key, CallProfile())
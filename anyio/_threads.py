@@ -0,0 +1,662 @@
+import threading
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future
+from time import monotonic
+from typing import (  # noqa: F401
+    TYPE_CHECKING, Callable, Dict, Tuple, Any, Optional, NamedTuple, List, Union)
+
+from async_generator import async_generator, yield_
+
+from .exceptions import ClosedResourceError, EndOfStream
+
+if TYPE_CHECKING:
+    from typing import Deque  # noqa: F401 (not available before Python 3.5.4)
+
+DEFAULT_POOL = 'default'
+FILEIO_POOL = 'fileio'
+DNS_POOL = 'dns'
+DEFAULT_MAX_THREADS = 40
+IDLE_TIMEOUT = 10
+
+HISTOGRAM_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1, 10, float('inf'))
+
+MAX_REPORTED_CALLS = 5
+
+_WorkItem = Tuple[Future, Callable, tuple, Any, float]
+
+WorkerPoolStatistics = NamedTuple('WorkerPoolStatistics', [
+    ('name', str),
+    ('max_threads', int),
+    ('threads', int),
+    ('active_calls', int),
+    ('queued_calls', int),
+    ('total_calls', int),
+    ('histogram_buckets', Tuple[float, ...]),
+    ('queue_wait_histogram', Tuple[int, ...]),
+    ('run_time_histogram', Tuple[int, ...]),
+    ('longest_running_calls', List[Tuple[str, float]])
+])
+WorkerPoolStatistics.__doc__ = """
+A snapshot of the state of a worker thread pool.
+
+:ivar str name: name of the pool
+:ivar int max_threads: maximum number of threads in the pool
+:ivar int threads: number of threads currently in the pool
+:ivar int active_calls: number of calls currently being run by the worker threads
+:ivar int queued_calls: number of calls waiting for a free worker thread
+:ivar int total_calls: number of calls submitted to the pool since it was created
+:ivar tuple histogram_buckets: upper bounds (in seconds) of the histogram buckets
+:ivar tuple queue_wait_histogram: number of calls in each bucket by how long they waited for a
+    worker thread
+:ivar tuple run_time_histogram: number of finished calls in each bucket by how long they took to
+    run
+:ivar list longest_running_calls: ``(function name, seconds running)`` tuples for the calls that
+    have been running the longest, longest first
+"""
+
+
+def get_callable_name(func) -> str:
+    while hasattr(func, 'func'):  # functools.partial
+        func = func.func
+
+    qualname = getattr(func, '__qualname__', None)
+    if qualname is None:
+        return repr(func)
+
+    module = getattr(func, '__module__', None)
+    return '{}.{}'.format(module, qualname) if module else qualname
+
+
+class ThreadCancelStatus:
+    """
+    Lets a worker thread see whether the task waiting on it has been cancelled.
+
+    The event loop side sets :attr:`cancelled` when the waiting task is cancelled. The worker
+    thread only reads attributes and the event loop's clock, so checking is cheap and needs no
+    round trip to the event loop thread.
+    """
+
+    __slots__ = 'cancelled', 'deadline', 'clock'
+
+    def __init__(self, deadline: float, clock: Callable[[], float]) -> None:
+        self.cancelled = False
+        self.deadline = deadline
+        self.clock = clock
+
+    @property
+    def cancel_called(self) -> bool:
+        if self.cancelled:
+            return True
+
+        return self.deadline != float('inf') and self.clock() >= self.deadline
+
+
+class CallbackBatch:
+    """
+    Collects callbacks from any number of threads and runs them in a single event loop wake-up.
+
+    ``wake`` is called (from whichever thread adds the first callback of a batch) with a function
+    that must be run in the event loop thread. Callbacks added before that function runs are
+    handled by the same wake-up. If a callback raises an exception, ``handle_error`` is called
+    with the exception and the callback, and the rest of the batch is still run.
+    """
+
+    __slots__ = '_lock', '_callbacks', '_wake', '_handle_error'
+
+    def __init__(self, wake: Callable[[Callable[[], None]], Any],
+                 handle_error: Callable[[Exception, Callable], Any]) -> None:
+        self._lock = threading.Lock()
+        self._callbacks = []  # type: List[Tuple[Callable, tuple]]
+        self._wake = wake
+        self._handle_error = handle_error
+
+    def call_soon(self, func: Callable, *args) -> None:
+        with self._lock:
+            self._callbacks.append((func, args))
+            if len(self._callbacks) > 1:
+                return
+
+        self._wake(self._run_callbacks)
+
+    def _run_callbacks(self) -> None:
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+
+        base_exception = None  # type: Optional[BaseException]
+        for func, args in callbacks:
+            try:
+                func(*args)
+            except Exception as exc:
+                self._handle_error(exc, func)
+            except BaseException as exc:
+                # Let KeyboardInterrupt and the like through once the rest of the batch has run
+                if base_exception is None:
+                    base_exception = exc
+
+        if base_exception is not None:
+            raise base_exception
+
+
+class WorkerThreadPool:
+    """
+    A bounded pool of reusable worker threads.
+
+    Threads are started on demand, up to ``max_threads``, and exit after they have been idle for
+    ``IDLE_TIMEOUT`` seconds. Work items submitted while all threads are busy are queued.
+    """
+
+    def __init__(self, name: str, max_threads: int = DEFAULT_MAX_THREADS) -> None:
+        self.name = name
+        self.saturation_callback = None  # type: Optional[Callable[[WorkerPoolStatistics], Any]]
+        self._max_threads = max_threads
+        self._lock = threading.Lock()
+        self._work_available = threading.Condition(self._lock)
+        self._queue = deque()  # type: Deque[_WorkItem]
+        self._num_threads = 0
+        self._idle_threads = 0
+        self._saturated = False
+        self._total_calls = 0
+        self._active_calls = {}  # type: Dict[int, Tuple[Any, float]]
+        self._queue_wait_histogram = [0] * len(HISTOGRAM_BUCKETS)
+        self._run_time_histogram = [0] * len(HISTOGRAM_BUCKETS)
+
+    @property
+    def max_threads(self) -> int:
+        return self._max_threads
+
+    @max_threads.setter
+    def max_threads(self, value: int) -> None:
+        if value < 1:
+            raise ValueError('max_threads must be at least 1')
+
+        with self._lock:
+            self._max_threads = value
+            missing = min(value - self._num_threads, len(self._queue) - self._idle_threads)
+            for _ in range(missing):
+                self._start_thread()
+
+    def submit(self, func: Callable, *args, target: Any = None) -> Future:
+        """
+        Schedule ``func(*args)`` to be run in a worker thread.
+
+        :param target: the callable to name in the pool statistics, if ``func`` is just a wrapper
+            for it
+        :return: a future that is resolved with the outcome of the call
+
+        """
+        future = Future()  # type: Future
+        with self._lock:
+            self._total_calls += 1
+            self._queue.append((future, func, args, target or func, monotonic()))
+            became_saturated = self._adjust_thread_count()
+
+        if became_saturated and self.saturation_callback is not None:
+            self.saturation_callback(self.statistics())
+
+        return future
+
+    def statistics(self) -> WorkerPoolStatistics:
+        now = monotonic()
+        with self._lock:
+            active_calls = sorted(self._active_calls.values(), key=lambda call: call[1])
+            return WorkerPoolStatistics(
+                self.name, self._max_threads, self._num_threads, len(self._active_calls),
+                len(self._queue), self._total_calls, HISTOGRAM_BUCKETS,
+                tuple(self._queue_wait_histogram),
+                tuple(self._run_time_histogram),
+                [(get_callable_name(target), now - started)
+                 for target, started in active_calls[:MAX_REPORTED_CALLS]])
+
+    def _adjust_thread_count(self) -> bool:
+        # Must be called with the lock held; returns True if the pool just became saturated
+        if self._idle_threads >= len(self._queue):
+            self._work_available.notify()
+        elif self._num_threads < self._max_threads:
+            self._start_thread()
+        elif not self._saturated:
+            self._saturated = True
+            return True
+
+        return False
+
+    def _start_thread(self) -> None:
+        # Must be called with the lock held
+        self._num_threads += 1
+        thread = threading.Thread(target=self._run_worker, daemon=True,
+                                  name='AnyIO worker thread ({})'.format(self.name))
+        thread.start()
+
+    def _run_worker(self) -> None:
+        thread_id = threading.get_ident()
+        while True:
+            with self._lock:
+                while not self._queue:
+                    self._saturated = False
+                    self._idle_threads += 1
+                    notified = self._work_available.wait(IDLE_TIMEOUT)
+                    self._idle_threads -= 1
+                    if not notified and not self._queue:
+                        self._num_threads -= 1
+                        return
+
+                future, func, args, target, submitted = self._queue.popleft()
+                started = monotonic()
+                self._queue_wait_histogram[bisect_left(HISTOGRAM_BUCKETS,
+                                                       started - submitted)] += 1
+                if not future.set_running_or_notify_cancel():
+                    continue
+
+                self._active_calls[thread_id] = target, started
+
+            result = exception = None
+            try:
+                result = func(*args)
+            except BaseException as exc:
+                exception = exc
+
+            # Update the statistics before waking up the caller
+            run_time = monotonic() - started
+            with self._lock:
+                del self._active_calls[thread_id]
+                self._run_time_histogram[bisect_left(HISTOGRAM_BUCKETS, run_time)] += 1
+
+            if exception is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exception)
+
+            del future, func, args, target, result, exception
+
+
+_pools = {}  # type: Dict[str, WorkerThreadPool]
+_pools_lock = threading.Lock()
+
+
+def get_worker_pool(name: Optional[str] = None) -> WorkerThreadPool:
+    name = name or DEFAULT_POOL
+    try:
+        return _pools[name]
+    except KeyError:
+        with _pools_lock:
+            return _pools.setdefault(name, WorkerThreadPool(name))
+
+
+class WorkerLane:
+    """
+    Runs the calls submitted to it one at a time, in submission order, in a worker thread pool.
+
+    A lane occupies at most one thread of the pool. Once a thread has picked up the lane, it keeps
+    running the calls queued in the lane until the queue is empty, so calls submitted in quick
+    succession (even by different tasks) run back to back in the same thread, without waiting for
+    each other's results to be delivered first.
+    """
+
+    __slots__ = 'pool', '_lock', '_queue', '_running'
+
+    def __init__(self, pool: WorkerThreadPool) -> None:
+        self.pool = pool
+        self._lock = threading.Lock()
+        self._queue = deque()  # type: Deque[Tuple[Future, Callable, tuple]]
+        self._running = False
+
+    def submit(self, func: Callable, *args, target: Any = None) -> Future:
+        """
+        Schedule ``func(*args)`` to be run in the lane after all the calls submitted before it.
+
+        :param target: the callable to name in the pool statistics, if ``func`` is just a wrapper
+            for it
+        :return: a future that is resolved with the outcome of the call
+
+        """
+        future = Future()  # type: Future
+        with self._lock:
+            self._queue.append((future, func, args))
+            if self._running:
+                return future
+
+            self._running = True
+
+        try:
+            self.pool.submit(self._run_queue, target=target or func)
+        except BaseException:
+            # Don't leave the lane marked as running when no thread is going to run it
+            with self._lock:
+                self._queue.remove((future, func, args))
+                self._running = False
+
+            raise
+
+        return future
+
+    def _run_queue(self) -> None:
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._running = False
+                    return
+
+                future, func, args = self._queue.popleft()
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = func(*args)
+                except BaseException as exc:
+                    future.set_exception(exc)
+                else:
+                    future.set_result(result)
+
+            del future, func, args
+
+
+def get_executor(pool: Union[str, WorkerLane, None]) -> Union[WorkerThreadPool, WorkerLane]:
+    return pool if isinstance(pool, WorkerLane) else get_worker_pool(pool)
+
+
+class ThreadChannel:
+    """
+    A bounded channel for sending items from any number of threads to event loop tasks.
+
+    Items are sent with the synchronous :meth:`send` method, which blocks the sending thread while
+    the channel is full, and received with the asynchronous :meth:`receive` method or by
+    iterating over the channel. A receiving task that runs out of items is woken up only once, no
+    matter how many items are sent before it gets to run.
+
+    Using the channel as an asynchronous context manager closes the receiving side on exit.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+
+        self._capacity = capacity
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._items = deque()  # type: Deque[Any]
+        self._waiters = []  # type: List[Future]
+        self._send_closed = False
+        self._receive_closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
+
+    @async_generator
+    async def __aiter__(self):
+        while True:
+            try:
+                items = await self.receive_batch()
+            except EndOfStream:
+                break
+
+            for item in items:
+                await yield_(item)
+
+    def _wake_receivers(self) -> None:
+        # Must be called with the lock held. Each waiting receiver has its own future, so that
+        # cancelling one receiver does not cancel the others.
+        for waiter in self._waiters:
+            if waiter.set_running_or_notify_cancel():
+                waiter.set_result(None)
+
+        self._waiters.clear()
+
+    def send(self, item, timeout: Optional[float] = None) -> None:
+        """
+        Send an item to the receiving side.
+
+        If the channel is full, this method blocks until there is room for the item. It must
+        therefore not be called from the event loop thread.
+
+        :param item: the object to send
+        :param timeout: maximum number of seconds to wait for room in the channel (``None`` to wait
+            indefinitely)
+        :raises anyio.exceptions.ClosedResourceError: if either side of the channel has been
+            closed
+        :raises TimeoutError: if the channel stayed full for ``timeout`` seconds
+
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        with self._lock:
+            while True:
+                if self._send_closed or self._receive_closed:
+                    raise ClosedResourceError
+
+                if len(self._items) < self._capacity:
+                    break
+
+                remaining = None if deadline is None else deadline - monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError
+
+                self._not_full.wait(remaining)
+
+            self._items.append(item)
+            self._wake_receivers()
+
+    def close(self) -> None:
+        """
+        Close the sending side of the channel.
+
+        The receiving side gets the items that have already been sent, after which it gets
+        :exc:`~anyio.exceptions.EndOfStream`.
+
+        """
+        with self._lock:
+            self._send_closed = True
+            self._not_full.notify_all()
+            self._wake_receivers()
+
+    async def receive(self):
+        """
+        Receive the next item from the channel.
+
+        :return: the received item
+        :raises anyio.exceptions.EndOfStream: if the sending side has been closed and there are no
+            more items in the channel
+        :raises anyio.exceptions.ClosedResourceError: if the receiving side has been closed
+
+        """
+        items = await self.receive_batch(1)
+        return items[0]
+
+    async def receive_batch(self, max_items: Optional[int] = None) -> list:
+        """
+        Receive all the items currently in the channel, waiting for at least one to arrive.
+
+        :param max_items: maximum number of items to receive
+        :return: a list of received items
+        :raises anyio.exceptions.EndOfStream: if the sending side has been closed and there are no
+            more items in the channel
+        :raises anyio.exceptions.ClosedResourceError: if the receiving side has been closed
+
+        """
+        from . import _get_asynclib
+
+        while True:
+            with self._lock:
+                if self._receive_closed:
+                    raise ClosedResourceError
+                elif self._items:
+                    count = len(self._items)
+                    if max_items is not None:
+                        count = min(count, max_items)
+
+                    items = [self._items.popleft() for _ in range(count)]
+                    self._not_full.notify(count)
+                    return items
+                elif self._send_closed:
+                    raise EndOfStream
+
+                waiter = Future()  # type: Future
+                self._waiters.append(waiter)
+
+            try:
+                await _get_asynclib().wait_future(waiter)
+            finally:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+
+    async def aclose(self) -> None:
+        """
+        Close the receiving side of the channel.
+
+        Any items still in the channel are discarded, and any further attempts to send items raise
+        :exc:`~anyio.exceptions.ClosedResourceError`.
+
+        """
+        with self._lock:
+            self._receive_closed = True
+            self._items.clear()
+            self._not_full.notify_all()
+            self._wake_receivers()
+
+
+class BlockingPortal:
+    """
+    Runs an event loop in a dedicated thread and lets other threads call into it.
+
+    Requests from other threads are collected into a queue, and the event loop thread drains the
+    whole queue every time it is woken up.
+    """
+
+    def __init__(self, backend: str, backend_options: Optional[Dict[str, Any]] = None) -> None:
+        self._backend = backend
+        self._backend_options = backend_options
+        self._lock = threading.Lock()
+        self._requests = deque()  # type: Deque[Tuple[Future, Callable, tuple]]
+        self._wakeup = Future()  # type: Future
+        self._stop_requested = False
+        self._cancel_remaining = False
+        self._started = threading.Event()
+        self._exception = None  # type: Optional[BaseException]
+        self._loop_thread = threading.Thread(target=self._run_event_loop, daemon=True,
+                                             name='AnyIO portal ({})'.format(backend))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop(cancel_remaining=exc_type is not None)
+
+    def _start(self) -> None:
+        self._loop_thread.start()
+        self._started.wait()
+        if self._exception is not None:
+            raise self._exception
+
+    def _run_event_loop(self) -> None:
+        from . import run
+
+        try:
+            run(self._run_portal, backend=self._backend, backend_options=self._backend_options)
+        except BaseException as exc:
+            self._exception = exc
+        finally:
+            with self._lock:
+                self._stop_requested = True
+                requests, self._requests = self._requests, deque()
+
+            for future, func, args in requests:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(RuntimeError('The portal has been stopped'))
+
+            self._started.set()
+
+    async def _run_portal(self) -> None:
+        from . import _get_asynclib, create_task_group
+
+        wait_future = _get_asynclib().wait_future
+        async with create_task_group() as tg:
+            self._started.set()
+            while True:
+                await wait_future(self._wakeup)
+                with self._lock:
+                    self._wakeup = Future()
+                    requests, self._requests = self._requests, deque()
+                    stop_requested = self._stop_requested
+
+                for future, func, args in requests:
+                    if future.set_running_or_notify_cancel():
+                        try:
+                            await tg.spawn(self._call_func, func, args, future)
+                        except BaseException as exc:
+                            future.set_exception(exc)
+                            raise
+
+                if stop_requested:
+                    if self._cancel_remaining:
+                        await tg.cancel_scope.cancel()
+
+                    break
+
+    @staticmethod
+    async def _call_func(func: Callable, args: tuple, future: Future) -> None:
+        try:
+            retval = await func(*args)
+        except BaseException as exc:
+            future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+        else:
+            future.set_result(retval)
+
+    def _check_not_in_loop_thread(self) -> None:
+        if threading.current_thread() is self._loop_thread:
+            raise RuntimeError('This method cannot be called from the event loop thread')
+
+    def start_task_soon(self, func: Callable, *args) -> Future:
+        """
+        Schedule the given coroutine function to be run in the event loop thread.
+
+        :param func: a coroutine function
+        :param args: positional arguments for the coroutine function
+        :return: a future that is resolved with the outcome of the call
+        :raises RuntimeError: if the portal has been stopped
+
+        """
+        future = Future()  # type: Future
+        with self._lock:
+            if self._stop_requested:
+                raise RuntimeError('The portal has been stopped')
+
+            self._requests.append((future, func, args))
+            if not self._wakeup.done():
+                self._wakeup.set_result(None)
+
+        return future
+
+    def call(self, func: Callable, *args):
+        """
+        Call the given coroutine function in the event loop thread and wait for the result.
+
+        :param func: a coroutine function
+        :param args: positional arguments for the coroutine function
+        :return: the return value of the coroutine function
+        :raises RuntimeError: if the portal has been stopped, or if called from the event loop
+            thread
+
+        """
+        self._check_not_in_loop_thread()
+        return self.start_task_soon(func, *args).result()
+
+    def stop(self, cancel_remaining: bool = False) -> None:
+        """
+        Stop the event loop and wait for the event loop thread to finish.
+
+        :param cancel_remaining: ``True`` to cancel all the remaining tasks, ``False`` to let them
+            finish before stopping
+
+        """
+        self._check_not_in_loop_thread()
+        with self._lock:
+            if not self._stop_requested:
+                self._stop_requested = True
+                self._cancel_remaining = cancel_remaining
+                if not self._wakeup.done():
+                    self._wakeup.set_result(None)
+
+        self._loop_thread.join()
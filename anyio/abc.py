@@ -2,12 +2,51 @@ from abc import ABCMeta, abstractmethod
 from io import SEEK_SET
 from ipaddress import IPv4Address, IPv6Address
 from ssl import SSLContext
-from typing import Callable, TypeVar, Optional, Tuple, Union, AsyncIterable, Dict, List, Coroutine
+from typing import (
+    Callable, TypeVar, Optional, Tuple, Union, AsyncIterable, Dict, Iterable, List, Coroutine,
+    Any)
 
 T_Retval = TypeVar('T_Retval')
 IPAddressType = Union[str, IPv4Address, IPv6Address]
 
 
+class Runner(metaclass=ABCMeta):
+    """
+    Runs coroutine functions, one after another, on the same event loop.
+
+    Use this instead of calling :func:`~anyio.run` repeatedly to avoid the cost of starting and
+    tearing down an event loop every time.
+
+    This class supports the context manager protocol which closes the runner at the end of the
+    context block.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @abstractmethod
+    def run(self, func: Callable[..., Coroutine[Any, Any, T_Retval]], *args) -> T_Retval:
+        """
+        Run the given coroutine function in the event loop and wait for it to finish.
+
+        :param func: a coroutine function
+        :param args: positional arguments to ``func``
+        :return: the return value of the coroutine function
+        :raises RuntimeError: if the runner has been closed
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """
+        Cancel any remaining tasks, finalize asynchronous generators and close the event loop.
+
+        Calling this method more than once has no effect.
+        """
+
+
 class Lock(metaclass=ABCMeta):
     @abstractmethod
     async def __aenter__(self):
@@ -193,6 +232,13 @@ class AsyncFile(metaclass=ABCMeta):
 
     All other methods are directly passed through.
 
+    To process large files efficiently, :meth:`iter_chunks` and :meth:`iter_lines_batched` read
+    many lines or bytes with a single call in a worker thread.
+
+    The positional methods (:meth:`pread`, :meth:`pwrite`, :meth:`preadv` and :meth:`pwritev`)
+    neither use nor move the file position, so many tasks can read or write disjoint ranges of the
+    same file at once.
+
     This class supports the asynchronous context manager protocol which closes the underlying file
     at the end of the context block.
 
@@ -267,6 +313,219 @@ class AsyncFile(metaclass=ABCMeta):
     async def close(self) -> None:
         pass
 
+    @abstractmethod
+    async def mmap(self) -> 'MemoryMappedFile':
+        """
+        Map the file into memory for zero-copy reading.
+
+        The file must have been opened for reading. Any buffered writes are flushed first.
+
+        :return: a read-only memory mapping of the whole file
+        :rtype: MemoryMappedFile
+
+        """
+
+    @abstractmethod
+    def iter_chunks(self, size: int = 65536) -> AsyncIterable[Union[memoryview, str]]:
+        """
+        Iterate over the rest of the file in chunks.
+
+        Each chunk is read with a single call in a worker thread.
+
+        :param size: maximum size of each chunk (in bytes, or characters in text mode)
+        :return: an asynchronous iterator yielding memoryviews (or strings in text mode)
+
+        """
+
+    @abstractmethod
+    def iter_lines_batched(self, max_lines: int = 1000) -> AsyncIterable[list]:
+        """
+        Iterate over the rest of the lines in the file in batches.
+
+        Each batch is read with a single call in a worker thread.
+
+        :param max_lines: maximum number of lines in each batch
+        :return: an asynchronous iterator yielding lists of lines
+
+        """
+
+    @abstractmethod
+    async def pread(self, size: int, offset: int) -> bytes:
+        """
+        Read bytes from the given position in the file, without changing the file position.
+
+        Positional I/O bypasses the buffers of the file object, so call :meth:`flush` first if
+        data has been written to the file with :meth:`write`. Only binary mode files are
+        supported.
+
+        :param size: maximum number of bytes to read
+        :param offset: position in the file to read from
+        :return: the bytes read (fewer than ``size`` only at the end of the file)
+
+        """
+
+    @abstractmethod
+    async def pwrite(self, data: bytes, offset: int) -> int:
+        """
+        Write bytes at the given position in the file, without changing the file position.
+
+        Positional I/O bypasses the buffers of the file object, so call :meth:`flush` first if
+        data has been written to the file with :meth:`write`. Only binary mode files are
+        supported.
+
+        :param data: the bytes to write
+        :param offset: position in the file to write to
+        :return: the number of bytes written
+
+        """
+
+    @abstractmethod
+    async def preadv(self, buffers: List[Union[bytearray, memoryview]], offset: int) -> int:
+        """
+        Read bytes from the given position in the file into several buffers, in order.
+
+        This is like :meth:`pread`, but fills the buffers with a single call in a worker thread.
+
+        :param buffers: writable buffers to read into
+        :param offset: position in the file to read from
+        :return: the total number of bytes read
+
+        """
+
+    @abstractmethod
+    async def pwritev(self, buffers: List[Union[bytes, memoryview]], offset: int) -> int:
+        """
+        Write the contents of several buffers at the given position in the file, in order.
+
+        This is like :meth:`pwrite`, but writes all the buffers with a single call in a worker
+        thread.
+
+        :param buffers: the buffers to write
+        :param offset: position in the file to write to
+        :return: the total number of bytes written
+
+        """
+
+
+class SpooledTemporaryFile(AsyncFile):
+    """
+    An asynchronous temporary file that keeps its data in memory until it grows too large.
+
+    As long as the data is kept in memory, the file operations run directly in the event loop
+    thread. Once a write would make the file larger than its maximum size, the data is moved to a
+    real temporary file in a worker thread, and from then on the file operations run in worker
+    threads like with any other asynchronous file.
+
+    Operations that need a file descriptor, such as ``fileno()``, :meth:`~AsyncFile.pread` and
+    friends, only work after the file has been rolled over to disk (with :meth:`rollover`, if
+    necessary). :meth:`~AsyncFile.mmap` rolls the file over automatically.
+    """
+
+    @property
+    @abstractmethod
+    def rolled(self) -> bool:
+        """``True`` if the data has been moved to a temporary file on disk."""
+
+    @abstractmethod
+    async def rollover(self) -> None:
+        """Move the data to a temporary file on disk, if that has not happened already."""
+
+
+class MemoryMappedFile(metaclass=ABCMeta):
+    """
+    A read-only memory mapping of a file.
+
+    Data is returned as :class:`memoryview` slices of the mapping, so it is never copied. Before
+    a range is returned, its pages are read into memory in a worker thread, so accessing the data
+    does not block the event loop.
+
+    Closing the mapping does not invalidate the returned memoryviews that are still in use; the
+    memory is unmapped once the last of them has been released (or garbage collected).
+
+    This class supports the asynchronous context manager protocol which closes the mapping at the
+    end of the context block, and asynchronous iteration which yields the rest of the mapping in
+    chunks.
+    """
+
+    @abstractmethod
+    async def __aenter__(self):
+        pass
+
+    @abstractmethod
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    async def __aiter__(self):
+        pass
+
+    @abstractmethod
+    async def view(self, offset: int, size: int = -1) -> memoryview:
+        """
+        Return a slice of the mapping.
+
+        :param offset: offset of the slice from the beginning of the file
+        :param size: length of the slice (-1 to go to the end of the file)
+        :return: a memoryview of the requested range (shorter than requested if the end of the
+            file is reached)
+
+        """
+
+    @abstractmethod
+    async def read(self, size: int = -1) -> memoryview:
+        """
+        Return a slice of the mapping starting from the current position, and advance the position.
+
+        :param size: length of the slice (-1 to go to the end of the file)
+        :return: a memoryview of the requested range (empty at the end of the file)
+
+        """
+
+    @abstractmethod
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        """
+        Change the current position.
+
+        :param offset: the new position, relative to ``whence``
+        :param whence: ``os.SEEK_SET``, ``os.SEEK_CUR`` or ``os.SEEK_END``
+        :return: the new absolute position
+
+        """
+
+    @abstractmethod
+    def tell(self) -> int:
+        """Return the current position."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Close the mapping."""
+
+
+class GroupCommitWriter(metaclass=ABCMeta):
+    """
+    Writes data to a file durably, on behalf of many tasks at once.
+
+    Data written by tasks while a previous batch is being committed is collected into the next
+    batch, and each batch is committed to the file with a single write and a single
+    :func:`os.fdatasync` call (:func:`os.fsync` where that is not available).
+    """
+
+    @abstractmethod
+    async def write(self, data: Union[bytes, str]) -> None:
+        """
+        Write data to the file and wait until it has been committed to stable storage.
+
+        If the calling task is cancelled while waiting, the data is still written to the file if
+        its batch is already being committed.
+
+        :param data: the data to write (a string if the file was opened in text mode)
+
+        """
+
 
 class Stream(metaclass=ABCMeta):
     async def __aenter__(self):
@@ -308,6 +567,37 @@ class Stream(metaclass=ABCMeta):
             and the peer prematurely closed the connection
         """
 
+    @abstractmethod
+    async def receive_into(self, buffer) -> int:
+        """
+        Read up to as many bytes as fit into the given buffer from the stream.
+
+        Buffered data is copied into the buffer first. If there is none, data is received from the
+        underlying socket directly into the buffer.
+
+        :param buffer: a writable bytes-like object, such as a :class:`bytearray` or a
+            :class:`memoryview`
+        :return: the number of bytes read (0 if the stream has been closed)
+        :raises ssl.SSLEOFError: if ``tls_standard_compatible`` was set to ``True`` in a TLS stream
+            and the peer prematurely closed the connection
+        """
+
+    @abstractmethod
+    async def receive_exactly_into(self, buffer) -> None:
+        """
+        Read exactly as many bytes as fit into the given buffer from the stream.
+
+        Buffered data is copied into the buffer first, and the rest is received from the
+        underlying socket directly into the buffer.
+
+        :param buffer: a writable bytes-like object, such as a :class:`bytearray` or a
+            :class:`memoryview`
+        :raises anyio.exceptions.IncompleteRead: if the stream was closed before the buffer could
+            be filled
+        :raises ssl.SSLEOFError: if ``tls_standard_compatible`` was set to ``True`` in a TLS stream
+            and the peer prematurely closed the connection
+        """
+
     @abstractmethod
     async def receive_until(self, delimiter: bytes, max_bytes: int) -> bytes:
         """
@@ -366,8 +656,59 @@ class Stream(metaclass=ABCMeta):
         :param data: the bytes to send
         """
 
+    @abstractmethod
+    async def send_all_many(self, buffers: Iterable[bytes]) -> None:
+        """
+        Send all of the data in the given buffers to the other end, in order.
+
+        This avoids both concatenating the buffers and sending each of them separately: on plain
+        sockets, the buffers are passed to the kernel together with :meth:`socket.socket.sendmsg`.
+        TLS streams concatenate the buffers, since the data has to be copied for encryption
+        anyway.
+
+        :param buffers: bytes-like objects to send
+        """
+
 
 class SocketStream(Stream):
+    @abstractmethod
+    async def send_file(self, file: AsyncFile, offset: int = 0,
+                        count: Optional[int] = None) -> int:
+        """
+        Send the contents of a file to the other end.
+
+        Where possible (on Linux, without TLS), the data is sent with :func:`os.sendfile` and is
+        never copied into Python objects. Otherwise it is read from the file in worker threads.
+
+        The file must have been opened in binary mode. Its position is left at the end of the sent
+        data.
+
+        :param file: an asynchronous file opened for reading
+        :param offset: position in the file to start sending from
+        :param count: maximum number of bytes to send (``None`` to send until the end of the file)
+        :return: the number of bytes sent
+
+        """
+
+    @abstractmethod
+    async def receive_into_file(self, file: AsyncFile, count: Optional[int] = None) -> int:
+        """
+        Receive data from the other end and write it to a file.
+
+        Where possible (on Linux with Python 3.10+, without TLS), the data is moved into the file
+        with :func:`os.splice` and is never copied into Python objects. Otherwise it is written to
+        the file in worker threads.
+
+        The file must have been opened in binary mode. The data is written at the current position
+        of the file, and the position is left at the end of the written data.
+
+        :param file: an asynchronous file opened for writing
+        :param count: maximum number of bytes to receive (``None`` to receive until the other end
+            closes the connection)
+        :return: the number of bytes written to the file
+
+        """
+
     @abstractmethod
     async def start_tls(self, context: Optional[SSLContext] = None) -> None:
         """
@@ -57,5 +57,9 @@ class ClosedResourceError(Exception):
     """Raised when a resource is closed by another task."""
 
 
+class EndOfStream(Exception):
+    """Raised when trying to receive from a channel that has been closed and emptied."""
+
+
 class TLSRequired(Exception):
     """Raised when a TLS related stream method is called before the TLS handshake has been done."""
@@ -0,0 +1,92 @@
+"""
+Measures how fast socket streams receive large fixed size frames and many small delimited frames.
+
+Each test is run with the stream's own :meth:`~anyio.abc.SocketStream.receive_exactly` and
+:meth:`~anyio.abc.SocketStream.receive_until` methods, and with reference implementations built on
+:meth:`~anyio.abc.SocketStream.receive_some` that collect the data by concatenating
+:class:`bytes` objects, like the stream methods used to do.
+
+Usage: python benchmarks/stream_receive.py [backend]
+"""
+import sys
+import time
+
+import anyio
+
+FRAME_SIZE = 16 * 1048576
+NUM_FRAMES = 4
+LINE = b'x' * 100
+NUM_LINES = 200000
+
+
+class ConcatenatingReceiver:
+    """Receives from a stream like the socket streams used to, by concatenating bytes objects."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._buffer = b''
+
+    async def receive_exactly(self, nbytes):
+        while len(self._buffer) < nbytes:
+            self._buffer += await self._stream.receive_some(nbytes)
+
+        result, self._buffer = self._buffer[:nbytes], self._buffer[nbytes:]
+        return result
+
+    async def receive_until(self, delimiter, max_size):
+        offset = 0
+        while True:
+            index = self._buffer.find(delimiter, offset)
+            if index >= 0:
+                found = self._buffer[:index]
+                self._buffer = self._buffer[index + len(delimiter):]
+                return found
+
+            offset = max(len(self._buffer) - len(delimiter) + 1, 0)
+            self._buffer += await self._stream.receive_some(max_size - len(self._buffer))
+
+
+async def receive_frames(receiver):
+    for _ in range(NUM_FRAMES):
+        await receiver.receive_exactly(FRAME_SIZE)
+
+
+async def receive_lines(receiver):
+    for _ in range(NUM_LINES):
+        await receiver.receive_until(b'\n', 1000)
+
+
+async def measure(name, data, receive, wrap, amount, unit):
+    async def serve():
+        async with await server.accept() as stream:
+            await stream.send_all(data)
+
+    async with await anyio.create_tcp_server(interface='localhost') as server:
+        async with anyio.create_task_group() as tg:
+            await tg.spawn(serve)
+            async with await anyio.connect_tcp('localhost', server.port) as client:
+                start = time.perf_counter()
+                await receive(wrap(client))
+                elapsed = time.perf_counter() - start
+
+    print('{:<40} {:>12.1f} {}/s'.format(name, amount / elapsed, unit))
+
+
+async def main():
+    def unwrapped(stream):
+        return stream
+
+    frames = bytes(FRAME_SIZE * NUM_FRAMES)
+    megabytes = len(frames) / 1048576
+    await measure('receive_exactly()', frames, receive_frames, unwrapped, megabytes, 'MB')
+    await measure('receive_exactly() with concatenation', frames, receive_frames,
+                  ConcatenatingReceiver, megabytes, 'MB')
+
+    lines = (LINE + b'\n') * NUM_LINES
+    await measure('receive_until()', lines, receive_lines, unwrapped, NUM_LINES, 'lines')
+    await measure('receive_until() with concatenation', lines, receive_lines,
+                  ConcatenatingReceiver, NUM_LINES, 'lines')
+
+
+if __name__ == '__main__':
+    anyio.run(main, backend=sys.argv[1] if len(sys.argv) > 1 else 'asyncio')
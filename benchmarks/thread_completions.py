@@ -0,0 +1,68 @@
+"""
+Compares how often the asyncio event loop is woken up by finished worker thread calls.
+
+Every call that :meth:`asyncio.AbstractEventLoop.run_in_executor` finishes writes to the event
+loop's self-pipe, while :func:`anyio.run_in_thread` hands finished calls to the event loop in
+batches. The write count is taken by counting calls to the loop's internal
+``_write_to_self()`` method, which performs one ``send()`` system call each time.
+
+Usage: python benchmarks/thread_completions.py [number of calls]
+"""
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import anyio
+
+
+def work():
+    time.sleep(0.0005)
+
+
+def count_self_pipe_writes(loop):
+    def write_to_self():
+        counter[0] += 1
+        original()
+
+    counter = [0]
+    original = loop._write_to_self
+    loop._write_to_self = write_to_self
+    return counter
+
+
+async def run_executor_calls(num_calls):
+    loop = asyncio.get_event_loop()
+    with ThreadPoolExecutor(anyio.get_max_worker_threads()) as executor:
+        await asyncio.gather(*[loop.run_in_executor(executor, work) for _ in range(num_calls)])
+
+
+async def run_anyio_calls(num_calls):
+    async with anyio.create_task_group() as tg:
+        for _ in range(num_calls):
+            await tg.spawn(anyio.run_in_thread, work)
+
+
+def measure(func, num_calls):
+    loop = asyncio.new_event_loop()
+    try:
+        counter = count_self_pipe_writes(loop)
+        start = time.perf_counter()
+        loop.run_until_complete(func(num_calls))
+        elapsed = time.perf_counter() - start
+    finally:
+        loop.close()
+
+    print('{:<20} {:>8} writes  {:>7.4f} writes/call  {:>8.1f} µs/call'.format(
+        func.__name__, counter[0], counter[0] / num_calls, elapsed / num_calls * 1000000))
+
+
+def main():
+    num_calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    print('{} calls'.format(num_calls))
+    measure(run_executor_calls, num_calls)
+    measure(run_anyio_calls, num_calls)
+
+
+if __name__ == '__main__':
+    main()
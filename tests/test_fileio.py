@@ -1,8 +1,15 @@
+import io
+import os
+import shutil
+import sys
 from pathlib import Path
 
 import pytest
 
-from anyio import aopen
+from anyio import (
+    aopen, create_task_group, scandir, walk, stat_many, copy_file, create_group_commit_writer,
+    create_spooled_temporary_file, watch_path, FileChange, finalize, fail_after, sleep,
+    wait_all_tasks_blocked)
 
 
 @pytest.fixture(scope='module')
@@ -43,3 +50,552 @@ async def test_async_iteration(tmpdir):
         lines_i = iter(lines)
         async for line in f:
             assert line == next(lines_i)
+
+
+@pytest.mark.anyio
+async def test_pinned(tmpdir):
+    path = Path(str(tmpdir.join('testfile')))
+    async with await aopen(path, 'wb', pinned=True) as f:
+        async with create_task_group() as tg:
+            for i in range(20):
+                await tg.spawn(f.write, b'%d\n' % i)
+                await wait_all_tasks_blocked()
+
+    assert path.read_bytes().splitlines() == [b'%d' % i for i in range(20)]
+
+
+class TestBufferedAsyncFile:
+    @pytest.mark.anyio
+    async def test_read(self, testdatafile, testdata):
+        async with await aopen(testdatafile, 'rb', async_buffer_size=1500) as f:
+            assert await f.read(10) == testdata[:10]
+            assert await f.read(2000) == testdata[10:2010]
+            assert await f.tell() == 2010
+            assert await f.read() == testdata[2010:]
+
+    @pytest.mark.anyio
+    async def test_readline(self, tmpdir):
+        lines = ['x' * 100 + '\n', 'foo\n', '\n', 'y' * 50 + '\n', 'bar']
+        testpath = tmpdir.join('testfile')
+        testpath.write_text(''.join(lines), 'ascii')
+        async with await aopen(str(testpath), async_buffer_size=16) as f:
+            assert await f.readline() == lines[0]
+            remaining = []
+            async for line in f:
+                remaining.append(line)
+
+            assert remaining == lines[1:]
+            assert await f.readline() == ''
+
+    @pytest.mark.anyio
+    async def test_readlines_binary(self, tmpdir):
+        testpath = tmpdir.join('testfile')
+        testpath.write_binary(b'foo\nbar\nbaz')
+        async with await aopen(str(testpath), 'rb', async_buffer_size=4) as f:
+            assert await f.readlines() == [b'foo\n', b'bar\n', b'baz']
+
+    @pytest.mark.anyio
+    async def test_readinto(self, testdatafile, testdata):
+        buffer = bytearray(100)
+        async with await aopen(testdatafile, 'rb', async_buffer_size=1500) as f:
+            assert await f.read(1) == testdata[:1]
+            assert await f.readinto(buffer) == 100
+            assert buffer == testdata[1:101]
+
+    @pytest.mark.anyio
+    async def test_write(self, tmpdir):
+        testpath = tmpdir.join('testfile')
+        async with await aopen(str(testpath), 'wb', 0, async_buffer_size=1000) as f:
+            for _ in range(10):
+                await f.write(b'x' * 10)
+
+            assert testpath.size() == 0
+            await f.flush()
+            assert testpath.size() == 100
+            await f.writelines([b'y' * 600, b'z' * 600])
+            assert testpath.size() == 1300
+            await f.write(b'end')
+
+        assert testpath.read_binary() == b'x' * 100 + b'y' * 600 + b'z' * 600 + b'end'
+
+    @pytest.mark.anyio
+    async def test_concurrent_writes(self, tmp_path):
+        async def write_lines(task_id):
+            for i in range(2000):
+                await f.write(b'%d-%d\n' % (task_id, i))
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        path = tmp_path / 'testfile'
+        try:
+            async with await aopen(path, 'wb', async_buffer_size=4096) as f:
+                async with create_task_group() as tg:
+                    for task_id in range(20):
+                        await tg.spawn(write_lines, task_id)
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        lines = path.read_bytes().splitlines()
+        assert sorted(lines) == sorted(b'%d-%d' % (task_id, i)
+                                       for task_id in range(20) for i in range(2000))
+
+    @pytest.mark.anyio
+    async def test_read_after_write(self, tmpdir):
+        testpath = tmpdir.join('testfile')
+        testpath.write_binary(b'0123456789')
+        async with await aopen(str(testpath), 'r+b', async_buffer_size=4) as f:
+            assert await f.read(2) == b'01'
+            await f.write(b'ab')
+            assert await f.read(2) == b'45'
+            await f.seek(0)
+            assert await f.read() == b'01ab456789'
+
+
+@pytest.mark.parametrize('async_buffer_size', [0, 1500], ids=['unbuffered', 'buffered'])
+class TestBatchedIteration:
+    @pytest.mark.anyio
+    async def test_iter_chunks(self, testdatafile, testdata, async_buffer_size):
+        async with await aopen(testdatafile, 'rb', async_buffer_size=async_buffer_size) as f:
+            assert await f.read(10) == testdata[:10]
+            chunks = []
+            async for chunk in f.iter_chunks(4000):
+                chunks.append(chunk)
+
+        assert all(isinstance(chunk, memoryview) for chunk in chunks)
+        assert all(len(chunk) <= 4000 for chunk in chunks)
+        assert b''.join(chunks) == testdata[10:]
+
+    @pytest.mark.anyio
+    async def test_iter_chunks_text(self, tmpdir, async_buffer_size):
+        testpath = tmpdir.join('testfile')
+        testpath.write_text('abcdefghij', 'ascii')
+        chunks = []
+        async with await aopen(str(testpath), async_buffer_size=async_buffer_size) as f:
+            async for chunk in f.iter_chunks(4):
+                chunks.append(chunk)
+
+        assert chunks == ['abcd', 'efgh', 'ij']
+
+    @pytest.mark.anyio
+    async def test_iter_lines_batched(self, tmpdir, async_buffer_size):
+        lines = ['line {}\n'.format(i) for i in range(25)]
+        testpath = tmpdir.join('testfile')
+        testpath.write_text(''.join(lines), 'ascii')
+        batches = []
+        async with await aopen(str(testpath), async_buffer_size=async_buffer_size) as f:
+            async for batch in f.iter_lines_batched(10):
+                batches.append(batch)
+
+        assert batches == [lines[:10], lines[10:20], lines[20:]]
+
+
+@pytest.mark.anyio
+async def test_iter_lines_batched_tell(tmpdir):
+    lines = ['line {}\n'.format(i) for i in range(25)]
+    testpath = tmpdir.join('testfile')
+    testpath.write_text(''.join(lines), 'ascii')
+    async with await aopen(str(testpath)) as f:
+        async for batch in f.iter_lines_batched(10):
+            assert batch == lines[:10]
+            break
+
+        assert await f.tell() == len(''.join(lines[:10]))
+
+
+class TestMemoryMappedFile:
+    @pytest.mark.anyio
+    async def test_read(self, testdatafile, testdata):
+        async with await aopen(testdatafile, 'rb') as f:
+            async with await f.mmap() as mapping:
+                assert len(mapping) == len(testdata)
+                data = await mapping.read(10)
+                assert isinstance(data, memoryview)
+                assert data == testdata[:10]
+                assert mapping.tell() == 10
+                assert await mapping.read() == testdata[10:]
+                assert await mapping.read() == b''
+
+    @pytest.mark.anyio
+    async def test_view(self, testdatafile, testdata):
+        async with await aopen(testdatafile, 'rb') as f:
+            async with await f.mmap() as mapping:
+                assert await mapping.view(5000, 100) == testdata[5000:5100]
+                assert await mapping.view(9990, 100) == testdata[9990:]
+                assert mapping.tell() == 0
+
+    @pytest.mark.anyio
+    async def test_close_with_view_in_use(self, testdatafile, testdata):
+        async with await aopen(testdatafile, 'rb') as f:
+            async with await f.mmap() as mapping:
+                data = await mapping.view(100, 10)
+
+        assert data == testdata[100:110]
+        data.release()
+
+    @pytest.mark.anyio
+    async def test_seek_and_iterate(self, testdatafile, testdata):
+        async with await aopen(testdatafile, 'rb') as f:
+            async with await f.mmap() as mapping:
+                assert mapping.seek(-1000, os.SEEK_END) == 9000
+                data = bytearray()
+                async for chunk in mapping:
+                    data += chunk
+
+                assert data == testdata[9000:]
+
+    @pytest.mark.anyio
+    async def test_empty_file(self, tmpdir):
+        testpath = tmpdir.join('testfile')
+        testpath.write_binary(b'')
+        async with await aopen(str(testpath), 'rb') as f:
+            async with await f.mmap() as mapping:
+                assert len(mapping) == 0
+                assert await mapping.read() == b''
+
+    @pytest.mark.anyio
+    async def test_buffered_writes_flushed(self, tmpdir):
+        testpath = tmpdir.join('testfile')
+        async with await aopen(str(testpath), 'w+b', async_buffer_size=100) as f:
+            await f.write(b'foo')
+            async with await f.mmap() as mapping:
+                assert await mapping.read() == b'foo'
+
+
+class TestPositionalIO:
+    @pytest.mark.anyio
+    async def test_concurrent_pread(self, testdatafile, testdata):
+        async def read_range(index):
+            results[index] = await f.pread(1000, index * 1000)
+
+        results = [None] * 10
+        async with await aopen(testdatafile, 'rb') as f:
+            async with create_task_group() as tg:
+                for i in range(10):
+                    await tg.spawn(read_range, i)
+
+            assert await f.tell() == 0
+
+        assert b''.join(results) == testdata
+
+    @pytest.mark.anyio
+    async def test_pread_past_end(self, testdatafile, testdata):
+        async with await aopen(testdatafile, 'rb') as f:
+            assert await f.pread(1000, len(testdata) - 10) == testdata[-10:]
+            assert await f.pread(1000, len(testdata)) == b''
+
+    @pytest.mark.anyio
+    async def test_pwrite(self, testdatafile, testdata):
+        async with await aopen(testdatafile, 'r+b') as f:
+            await f.seek(100)
+            assert await f.pwrite(b'x' * 10, 5000) == 10
+            assert await f.tell() == 100
+
+        assert testdatafile.read_bytes() == testdata[:5000] + b'x' * 10 + testdata[5010:]
+
+    @pytest.mark.anyio
+    async def test_preadv(self, testdatafile, testdata):
+        buffers = [bytearray(10), bytearray(20), memoryview(bytearray(30))]
+        async with await aopen(testdatafile, 'rb') as f:
+            assert await f.preadv(buffers, 995) == 60
+
+        assert b''.join(buffers) == testdata[995:1055]
+
+    @pytest.mark.anyio
+    async def test_preadv_past_end(self, testdatafile, testdata):
+        buffers = [bytearray(10), bytearray(20)]
+        async with await aopen(testdatafile, 'rb') as f:
+            assert await f.preadv(buffers, len(testdata) - 15) == 15
+
+        assert bytes(buffers[0]) + bytes(buffers[1][:5]) == testdata[-15:]
+
+    @pytest.mark.anyio
+    async def test_pwritev(self, tmpdir):
+        path = Path(str(tmpdir.join('testfile')))
+        path.write_bytes(b'-' * 20)
+        async with await aopen(path, 'r+b') as f:
+            assert await f.pwritev([b'foo', memoryview(b'bar'), bytearray(b'baz')], 5) == 9
+
+        assert path.read_bytes() == b'-' * 5 + b'foobarbaz' + b'-' * 6
+
+    @pytest.mark.anyio
+    async def test_text_mode(self, testdatafile):
+        async with await aopen(testdatafile, 'r') as f:
+            with pytest.raises(io.UnsupportedOperation):
+                await f.pread(10, 0)
+
+
+class TestDirectories:
+    @pytest.fixture
+    def tree(self, tmpdir):
+        root = Path(str(tmpdir))
+        for dirpath in ('a', 'a/b', 'a/b/c', 'd'):
+            (root / dirpath).mkdir()
+            for i in range(3):
+                (root / dirpath / 'file{}'.format(i)).write_bytes(b'x' * i)
+
+        return root
+
+    @pytest.mark.parametrize('batch_size', [1, 1000])
+    @pytest.mark.anyio
+    async def test_scandir(self, tree, batch_size):
+        names = []
+        async for entry in scandir(tree / 'a', batch_size=batch_size):
+            names.append((entry.name, entry.is_dir()))
+
+        assert sorted(names) == [('b', True), ('file0', False), ('file1', False),
+                                 ('file2', False)]
+
+    @pytest.mark.anyio
+    async def test_scandir_nonexistent(self, tree):
+        with pytest.raises(FileNotFoundError):
+            async for _ in scandir(tree / 'nonexistent'):
+                pass
+
+    @pytest.mark.parametrize('batch_size', [1, 1000])
+    @pytest.mark.anyio
+    async def test_walk(self, tree, batch_size):
+        results = []
+        async for dirpath, dirnames, filenames in walk(tree, batch_size=batch_size):
+            results.append((dirpath, sorted(dirnames), sorted(filenames)))
+
+        assert sorted(results) == sorted(
+            (dirpath, sorted(dirnames), sorted(filenames))
+            for dirpath, dirnames, filenames in os.walk(str(tree)))
+
+    @pytest.mark.anyio
+    async def test_walk_prune(self, tree):
+        dirpaths = []
+        async for dirpath, dirnames, filenames in walk(tree):
+            dirpaths.append(dirpath)
+            if 'b' in dirnames:
+                dirnames.remove('b')
+
+        assert sorted(dirpaths) == [str(tree), str(tree / 'a'), str(tree / 'd')]
+
+    @pytest.mark.anyio
+    async def test_walk_onerror(self, tree):
+        errors = []
+        async for _ in walk(tree / 'nonexistent', onerror=errors.append):
+            pytest.fail('Nothing should have been yielded')
+
+        assert len(errors) == 1
+        assert isinstance(errors[0], FileNotFoundError)
+
+    @pytest.mark.anyio
+    async def test_stat_many(self, tree):
+        paths = [tree / 'a' / 'file{}'.format(i) for i in range(3)]
+        paths.append(tree / 'nonexistent')
+        results = await stat_many(paths, chunksize=2)
+        assert [result.st_size for result in results[:3]] == [0, 1, 2]
+        assert results[3] is None
+
+
+class TestCopyFile:
+    @pytest.mark.parametrize('methods', [
+        (),
+        ('copy_file_range',),
+        ('copy_file_range', 'sendfile')
+    ], ids=['default', 'sendfile', 'buffered'])
+    @pytest.mark.anyio
+    async def test_copy_file(self, tmpdir, testdatafile, testdata, monkeypatch, methods):
+        for name in methods:
+            monkeypatch.delattr(os, name, raising=False)
+
+        reports = []
+        dst = Path(str(tmpdir.join('copy')))
+        dst.write_bytes(b'old contents' * 10000)
+        copied = await copy_file(testdatafile, dst, chunk_size=3000,
+                                 progress=lambda *args: reports.append(args))
+        assert copied == len(testdata)
+        assert dst.read_bytes() == testdata
+        assert reports == [(3000, 10000), (6000, 10000), (9000, 10000), (10000, 10000)]
+
+    @pytest.mark.anyio
+    async def test_copy_empty_file(self, tmpdir):
+        src = Path(str(tmpdir.join('empty')))
+        src.write_bytes(b'')
+        dst = Path(str(tmpdir.join('copy')))
+        assert await copy_file(src, dst) == 0
+        assert dst.read_bytes() == b''
+
+    @pytest.mark.anyio
+    async def test_same_file(self, testdatafile, testdata):
+        with pytest.raises(shutil.SameFileError):
+            await copy_file(testdatafile, testdatafile)
+
+        assert testdatafile.read_bytes() == testdata
+
+
+class TestGroupCommitWriter:
+    @pytest.mark.anyio
+    async def test_concurrent_writes(self, tmpdir, monkeypatch):
+        def fake_sync(fd):
+            nonlocal syncs
+            syncs += 1
+
+        syncs = 0
+        monkeypatch.setattr(os, 'fdatasync', fake_sync, raising=False)
+        path = Path(str(tmpdir.join('journal')))
+        async with await aopen(path, 'ab') as f:
+            writer = create_group_commit_writer(f)
+            async with create_task_group() as tg:
+                for i in range(10):
+                    await tg.spawn(writer.write, 'record {}\n'.format(i).encode())
+
+        # How the writes get batched depends on the scheduling order, but they must be batched
+        assert 1 <= syncs < 10
+        assert sorted(path.read_bytes().splitlines()) == sorted(
+            'record {}'.format(i).encode() for i in range(10))
+
+    @pytest.mark.anyio
+    async def test_buffered_file(self, tmpdir):
+        path = Path(str(tmpdir.join('journal')))
+        async with await aopen(path, 'a', async_buffer_size=100) as f:
+            await f.write('header\n')
+            writer = create_group_commit_writer(f)
+            await writer.write('record\n')
+            assert path.read_text() == 'header\nrecord\n'
+
+    @pytest.mark.anyio
+    async def test_write_error(self, testdatafile):
+        async with await aopen(testdatafile, 'rb') as f:
+            writer = create_group_commit_writer(f)
+            with pytest.raises(io.UnsupportedOperation):
+                await writer.write(b'record\n')
+
+
+class TestSpooledTemporaryFile:
+    @pytest.mark.anyio
+    async def test_in_memory(self):
+        async with create_spooled_temporary_file(100) as f:
+            await f.write(b'foo\n')
+            await f.writelines([b'bar\n', b'baz\n'])
+            await f.seek(0)
+            assert not f.rolled
+            assert await f.readline() == b'foo\n'
+            assert await f.read() == b'bar\nbaz\n'
+
+    @pytest.mark.anyio
+    async def test_rollover(self, testdata):
+        async with create_spooled_temporary_file(1500) as f:
+            await f.write(testdata[:1000])
+            assert not f.rolled
+            await f.write(testdata[1000:])
+            assert f.rolled
+            assert await f.tell() == len(testdata)
+            await f.seek(0)
+            assert await f.read() == testdata
+
+    @pytest.mark.anyio
+    async def test_rollover_explicitly(self, testdata):
+        async with create_spooled_temporary_file() as f:
+            await f.write(testdata)
+            await f.seek(100)
+            with pytest.raises(io.UnsupportedOperation):
+                await f.pread(10, 0)
+
+            await f.rollover()
+            assert f.rolled
+            assert await f.tell() == 100
+            assert await f.pread(10, 0) == testdata[:10]
+
+    @pytest.mark.anyio
+    async def test_write_during_rollover(self, testdata):
+        async with create_spooled_temporary_file(1500) as f:
+            await f.write(testdata[:1000])
+            async with create_task_group() as tg:
+                await tg.spawn(f.write, testdata[1000:2000])
+                await wait_all_tasks_blocked()
+                await f.write(testdata[2000:])
+
+            assert f.rolled
+            await f.seek(0)
+            assert await f.read() == testdata
+
+    @pytest.mark.anyio
+    async def test_iter_lines_batched(self):
+        async with create_spooled_temporary_file() as f:
+            await f.write(b'foo\nbar\nbaz\n')
+            await f.seek(0)
+            batches = []
+            async for lines in f.iter_lines_batched(2):
+                batches.append(lines)
+
+        assert batches == [[b'foo\n', b'bar\n'], [b'baz\n']]
+
+    @pytest.mark.anyio
+    async def test_text_mode(self):
+        with pytest.raises(ValueError) as exc:
+            create_spooled_temporary_file(mode='w+')
+
+        exc.match('only binary modes are supported')
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='requires inotify')
+class TestWatchPath:
+    @staticmethod
+    async def next_batch(watcher, root):
+        async with fail_after(5):
+            batch = await watcher.__anext__()
+
+        return {(change, os.path.relpath(path, str(root))) for change, path in batch}
+
+    @pytest.mark.anyio
+    async def test_directory(self, tmpdir):
+        async def make_changes():
+            await sleep(0.2)  # give the watcher time to set up its watches
+            (root / 'existing').write_bytes(b'new contents')
+            (root / 'new').write_bytes(b'foo')
+            (root / 'new').write_bytes(b'bar')
+            (root / 'temporary').write_bytes(b'foo')
+            (root / 'temporary').unlink()
+
+        root = Path(str(tmpdir))
+        (root / 'existing').write_bytes(b'contents')
+        async with finalize(watch_path(root, debounce=0.05)) as watcher:
+            async with create_task_group() as tg:
+                await tg.spawn(make_changes)
+                batch = await self.next_batch(watcher, root)
+
+        assert batch == {(FileChange.modified, 'existing'), (FileChange.added, 'new')}
+
+    @pytest.mark.anyio
+    async def test_recursive(self, tmpdir):
+        async def make_changes():
+            await sleep(0.2)  # give the watcher time to set up its watches
+            (root / 'sub' / 'file').write_bytes(b'foo')
+            (root / 'newdir').mkdir()
+            (root / 'newdir' / 'file').write_bytes(b'foo')
+
+        root = Path(str(tmpdir))
+        (root / 'sub').mkdir()
+        async with finalize(watch_path(root, recursive=True, debounce=0.05)) as watcher:
+            async with create_task_group() as tg:
+                await tg.spawn(make_changes)
+                batch = await self.next_batch(watcher, root)
+
+        assert batch == {(FileChange.added, os.path.join('sub', 'file')),
+                         (FileChange.added, 'newdir'),
+                         (FileChange.added, os.path.join('newdir', 'file'))}
+
+    @pytest.mark.anyio
+    async def test_recursive_short_lived_directory(self, tmpdir):
+        async def make_changes():
+            await sleep(0.2)  # give the watcher time to set up its watches
+            (root / 'tempdir').mkdir()
+            (root / 'tempdir').rmdir()
+            (root / 'file').write_bytes(b'foo')
+
+        root = Path(str(tmpdir))
+        async with finalize(watch_path(root, recursive=True, debounce=0.05)) as watcher:
+            async with create_task_group() as tg:
+                await tg.spawn(make_changes)
+                batch = await self.next_batch(watcher, root)
+
+        assert batch == {(FileChange.added, 'file')}
+
+    @pytest.mark.anyio
+    async def test_nonexistent(self, tmpdir):
+        with pytest.raises(FileNotFoundError):
+            async for _ in watch_path(str(tmpdir.join('nonexistent'))):
+                pass
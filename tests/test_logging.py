@@ -0,0 +1,153 @@
+import logging
+import threading
+
+import pytest
+
+from anyio import (
+    AsyncLogHandler, run_in_thread, set_max_worker_threads, set_worker_pool_saturation_callback)
+from anyio._threads import get_worker_pool
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self, gate=None):
+        super().__init__()
+        self.gate = gate
+        self.entered = threading.Event()
+        self.messages = []
+
+    def emit(self, record):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait()
+
+        self.messages.append(self.format(record))
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger('anyio.test')
+    logger.propagate = False
+    yield logger
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
+        handler.close()
+
+
+def test_emit(logger):
+    target = CollectingHandler()
+    handler = AsyncLogHandler(target)
+    logger.addHandler(handler)
+    for i in range(100):
+        logger.warning('message %d', i)
+
+    handler.flush()
+    assert target.messages == ['message {}'.format(i) for i in range(100)]
+
+
+def test_exception(logger):
+    target = CollectingHandler()
+    handler = AsyncLogHandler(target)
+    logger.addHandler(handler)
+    try:
+        raise ValueError('foo')
+    except ValueError:
+        logger.exception('failed')
+
+    handler.flush()
+    assert target.messages[0].startswith('failed\nTraceback')
+    assert target.messages[0].endswith('ValueError: foo')
+
+
+def test_drop(logger):
+    gate = threading.Event()
+    target = CollectingHandler(gate)
+    handler = AsyncLogHandler(target, capacity=2)
+    logger.addHandler(handler)
+    logger.warning('first')
+    assert target.entered.wait(5)  # the worker thread has picked up the first record
+
+    for i in range(5):
+        logger.warning('message %d', i)
+
+    gate.set()
+    handler.flush()
+    assert target.messages == ['first', '3 log records were dropped because the buffer was full',
+                               'message 0', 'message 1']
+
+
+def test_block(logger):
+    def log_more():
+        logger.warning('third')
+        done.set()
+
+    gate = threading.Event()
+    done = threading.Event()
+    target = CollectingHandler(gate)
+    handler = AsyncLogHandler(target, capacity=1, block=True)
+    logger.addHandler(handler)
+    logger.warning('first')
+    assert target.entered.wait(5)  # the worker thread has picked up the first record
+
+    logger.warning('second')
+    thread = threading.Thread(target=log_more)
+    thread.start()
+    assert not done.wait(0.1)
+    gate.set()
+    thread.join()
+    handler.flush()
+    assert target.messages == ['first', 'second', 'third']
+
+
+def test_block_from_target(logger):
+    class LoggingHandler(CollectingHandler):
+        def emit(self, record):
+            super().emit(record)
+            if record.getMessage() == 'first':
+                logger.warning('nested 1')
+                logger.warning('nested 2')
+
+    target = LoggingHandler()
+    handler = AsyncLogHandler(target, capacity=1, block=True)
+    logger.addHandler(handler)
+    logger.warning('first')
+    handler.flush()
+    assert target.messages == ['first', '1 log records were dropped because the buffer was full',
+                               'nested 1']
+
+
+def test_saturation_callback_logs(logger):
+    def pool_saturated(statistics):
+        logger.warning('pool saturated')
+
+    gate = threading.Event()
+    set_max_worker_threads(1, pool='logging_test')
+    set_worker_pool_saturation_callback(pool_saturated, pool='logging_test')
+    # Occupy the only thread, so that the handler's call saturates the pool
+    get_worker_pool('logging_test').submit(gate.wait)
+    try:
+        target = CollectingHandler()
+        handler = AsyncLogHandler(target, pool='logging_test')
+        logger.addHandler(handler)
+        logger.warning('first')
+        gate.set()
+        handler.flush()
+    finally:
+        set_worker_pool_saturation_callback(None, pool='logging_test')
+        gate.set()
+
+    assert target.messages == ['first', 'pool saturated']
+
+
+def test_invalid_capacity():
+    exc = pytest.raises(ValueError, AsyncLogHandler, logging.NullHandler(), capacity=0)
+    exc.match('capacity must be at least 1')
+
+
+@pytest.mark.anyio
+async def test_flush_from_event_loop(logger):
+    target = CollectingHandler()
+    handler = AsyncLogHandler(target)
+    logger.addHandler(handler)
+    logger.warning('message')
+    await run_in_thread(handler.flush)
+    assert target.messages == ['message']
@@ -1,3 +1,4 @@
+import os
 import socket
 import ssl
 import sys
@@ -7,7 +8,7 @@ import pytest
 
 from anyio import (
     create_task_group, connect_tcp, create_udp_socket, connect_unix, create_unix_server,
-    create_tcp_server)
+    create_tcp_server, aopen)
 from anyio.exceptions import IncompleteRead, DelimiterNotFound, ClosedResourceError
 
 
@@ -72,10 +73,133 @@ class TestTCPStream:
 
         assert response == b'blahbleh'
 
+    @pytest.mark.anyio
+    async def test_receive_exactly_large(self):
+        async def server():
+            async with await stream_server.accept() as stream:
+                await stream.send_all(data)
+
+        data = os.urandom(3000000)
+        async with create_task_group() as tg:
+            async with await create_tcp_server(interface='localhost') as stream_server:
+                await tg.spawn(server)
+                async with await connect_tcp('localhost', stream_server.port) as client:
+                    header = await client.receive_exactly(10)
+                    body = await client.receive_exactly(len(data) - 10)
+
+        assert header + body == data
+
+    @pytest.mark.anyio
+    async def test_receive_until_many_frames(self):
+        async def server():
+            async with await stream_server.accept() as stream:
+                await stream.send_all(b''.join(line + b'\n' for line in lines))
+
+        lines = [str(i).encode() * (i % 50) for i in range(10000)]
+        received = []
+        async with create_task_group() as tg:
+            async with await create_tcp_server(interface='localhost') as stream_server:
+                await tg.spawn(server)
+                async with await connect_tcp('localhost', stream_server.port) as client:
+                    for _ in lines:
+                        received.append(await client.receive_until(b'\n', 200))
+
+        assert received == lines
+
+    @pytest.mark.parametrize('many', [False, True], ids=['send_all', 'send_all_many'])
+    @pytest.mark.anyio
+    async def test_send_all_partial(self, many):
+        async def server():
+            async with await stream_server.accept() as stream:
+                received.append(await stream.receive_exactly(len(data)))
+
+        received = []
+        data = os.urandom(1000000)
+        buffers = [data[:10], b'', bytearray(data[10:500000]), memoryview(data)[500000:]]
+        async with create_task_group() as tg:
+            async with await create_tcp_server(interface='localhost') as stream_server:
+                await tg.spawn(server)
+                async with await connect_tcp('localhost', stream_server.port) as client:
+                    # Make the socket accept only a small part of the data at a time
+                    client._socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+                    if many:
+                        await client.send_all_many(buffers)
+                    else:
+                        await client.send_all(data)
+
+        assert received == [data]
+
+    @pytest.mark.parametrize('offset, count', [(0, None), (1000, 5000)], ids=['whole', 'range'])
+    @pytest.mark.anyio
+    async def test_send_file(self, tmp_path, offset, count):
+        async def server():
+            async with await stream_server.accept() as stream:
+                await stream.send_all(await stream.receive_exactly(len(expected)))
+
+        data = os.urandom(100000)
+        expected = data[offset:] if count is None else data[offset:offset + count]
+        path = tmp_path / 'testfile'
+        path.write_bytes(data)
+        async with create_task_group() as tg:
+            async with await create_tcp_server(interface='localhost') as stream_server:
+                await tg.spawn(server)
+                async with await connect_tcp('localhost', stream_server.port) as client:
+                    async with await aopen(path, 'rb') as f:
+                        sent = await client.send_file(f, offset, count)
+                        assert await f.tell() == offset + sent
+
+                    response = await client.receive_exactly(len(expected))
+
+        assert sent == len(expected)
+        assert response == expected
+
+    @pytest.mark.parametrize('count', [None, 5000], ids=['eof', 'count'])
+    @pytest.mark.anyio
+    async def test_receive_into_file(self, tmp_path, count):
+        async def server():
+            async with await stream_server.accept() as stream:
+                await stream.send_all(data)
+
+        data = os.urandom(100000)
+        path = tmp_path / 'testfile'
+        async with create_task_group() as tg:
+            async with await create_tcp_server(interface='localhost') as stream_server:
+                await tg.spawn(server)
+                async with await connect_tcp('localhost', stream_server.port) as client:
+                    header = await client.receive_exactly(10)
+                    async with await aopen(path, 'wb') as f:
+                        await f.write(header)
+                        received = await client.receive_into_file(f, count)
+                        assert await f.tell() == 10 + received
+
+        expected = data[10:] if count is None else data[10:10 + count]
+        assert received == len(expected)
+        assert path.read_bytes() == data[:10] + expected
+
+    @pytest.mark.anyio
+    async def test_receive_into_file_append(self, tmp_path):
+        async def server():
+            async with await stream_server.accept() as stream:
+                await stream.send_all(data)
+
+        data = os.urandom(100000)
+        path = tmp_path / 'testfile'
+        path.write_bytes(b'abcd')
+        async with create_task_group() as tg:
+            async with await create_tcp_server(interface='localhost') as stream_server:
+                await tg.spawn(server)
+                async with await connect_tcp('localhost', stream_server.port) as client:
+                    async with await aopen(path, 'ab') as f:
+                        received = await client.receive_into_file(f)
+
+        assert received == len(data)
+        assert path.read_bytes() == b'abcd' + data
+
     @pytest.mark.parametrize('method_name, params', [
         ('receive_until', [b'\n', 100]),
-        ('receive_exactly', [5])
-    ], ids=['read_until', 'read_exactly'])
+        ('receive_exactly', [5]),
+        ('receive_exactly_into', [bytearray(5)])
+    ], ids=['read_until', 'read_exactly', 'read_exactly_into'])
     @pytest.mark.anyio
     async def test_incomplete_read(self, method_name, params):
         async def server():
@@ -90,6 +214,8 @@ class TestTCPStream:
                     with pytest.raises(IncompleteRead):
                         await method(*params)
 
+                    assert client.buffered_data == b'bla'
+
     @pytest.mark.anyio
     async def test_delimiter_not_found(self):
         async def server():
@@ -138,6 +264,29 @@ class TestTCPStream:
 
         assert chunks == [b'blah', b'foob', b'ar']
 
+    @pytest.mark.anyio
+    async def test_receive_into(self):
+        async def server():
+            async with await stream_server.accept() as stream:
+                await stream.send_all(b'header\nblahfoobar')
+
+        buffer = bytearray(7)
+        async with await create_tcp_server(interface='localhost') as stream_server:
+            async with create_task_group() as tg:
+                await tg.spawn(server)
+                async with await connect_tcp('localhost', stream_server.port) as client:
+                    assert await client.receive_until(b'\n', 10) == b'header'
+                    await client.receive_exactly_into(buffer)
+                    assert buffer == b'blahfoo'
+                    received = 0
+                    while received < 3:
+                        count = await client.receive_into(memoryview(buffer)[received:])
+                        assert count
+                        received += count
+
+                    assert buffer[:received] == b'bar'
+                    assert await client.receive_into(buffer) == 0
+
     @pytest.mark.anyio
     async def test_receive_delimited_chunks(self):
         async def server():
@@ -0,0 +1,102 @@
+import os
+import time
+
+import pytest
+
+from anyio import (
+    run_in_process, create_task_group, get_max_worker_processes, set_max_worker_processes,
+    move_on_after, run_in_worker)
+from anyio import _processes
+from anyio._processes import PROFILE_SAMPLE_CALLS
+
+
+def raise_value_error(message):
+    raise ValueError(message)
+
+
+@pytest.mark.anyio
+async def test_run_in_process():
+    pid = await run_in_process(os.getpid)
+    assert pid != os.getpid()
+
+
+@pytest.mark.anyio
+async def test_run_in_process_exception():
+    with pytest.raises(ValueError) as exc:
+        await run_in_process(raise_value_error, 'foo')
+
+    exc.match('^foo$')
+
+
+@pytest.mark.anyio
+async def test_run_in_process_cancelled():
+    async with move_on_after(0.1):
+        await run_in_process(time.sleep, 2)
+        pytest.fail('The call was not cancelled')
+
+
+@pytest.mark.anyio
+async def test_run_in_process_cancelled_before_start():
+    async def worker():
+        await run_in_process(os.getpid)
+        pytest.fail('The call was not cancelled')
+
+    async with create_task_group() as tg:
+        await tg.spawn(worker)
+        await tg.cancel_scope.cancel()
+
+
+def test_set_max_worker_processes():
+    original = get_max_worker_processes()
+    set_max_worker_processes(2)
+    try:
+        assert get_max_worker_processes() == 2
+    finally:
+        set_max_worker_processes(original)
+
+
+def test_set_max_worker_processes_invalid():
+    exc = pytest.raises(ValueError, set_max_worker_processes, 0)
+    exc.match('max_processes must be at least 1')
+
+
+@pytest.fixture
+def call_profiles():
+    yield
+    _processes._call_profiles.clear()
+
+
+def spin(duration):
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        pass
+
+    return os.getpid()
+
+
+def sleep_and_get_pid(duration):
+    time.sleep(duration)
+    return os.getpid()
+
+
+@pytest.mark.anyio
+async def test_run_in_worker_cpu_bound(call_profiles, monkeypatch):
+    # Count all the wall clock time as CPU time, so that the routing decision does not depend on
+    # how busy the machine is
+    monkeypatch.setattr(_processes, 'thread_time', time.monotonic)
+    pids = [await run_in_worker(spin, 0.02) for _ in range(PROFILE_SAMPLE_CALLS + 1)]
+    assert pids[:-1] == [os.getpid()] * PROFILE_SAMPLE_CALLS
+    assert pids[-1] != os.getpid()
+
+
+@pytest.mark.anyio
+async def test_run_in_worker_io_bound(call_profiles):
+    for _ in range(PROFILE_SAMPLE_CALLS + 1):
+        assert await run_in_worker(sleep_and_get_pid, 0.02) == os.getpid()
+
+
+@pytest.mark.anyio
+async def test_run_in_worker_unpicklable(call_profiles):
+    spin_lambda = lambda: spin(0.02)  # noqa: E731
+    for _ in range(PROFILE_SAMPLE_CALLS + 1):
+        assert await run_in_worker(spin_lambda) == os.getpid()
@@ -0,0 +1,56 @@
+import pytest
+
+from anyio import create_runner, sleep, BACKENDS, run, create_event
+
+
+@pytest.fixture(params=BACKENDS)
+def backend(request):
+    return request.param
+
+
+def test_run_multiple(backend):
+    async def add(a, b):
+        await sleep(0)
+        return a + b
+
+    with create_runner(backend) as runner:
+        assert runner.run(add, 1, 2) == 3
+        assert runner.run(add, 3, 4) == 7
+
+
+def test_state_preserved_between_runs(backend):
+    async def get_event():
+        return create_event()
+
+    async def set_event():
+        await event.set()
+
+    with create_runner(backend) as runner:
+        event = runner.run(get_event)
+        runner.run(set_event)
+        assert event.is_set()
+
+
+def test_exception(backend):
+    async def fail():
+        raise ValueError('foo')
+
+    with create_runner(backend) as runner:
+        exc = pytest.raises(ValueError, runner.run, fail)
+        exc.match('^foo$')
+
+
+def test_run_after_close(backend):
+    runner = create_runner(backend)
+    runner.close()
+    runner.close()
+    exc = pytest.raises(RuntimeError, runner.run, sleep, 0)
+    exc.match('This runner has been closed')
+
+
+def test_nested_runner():
+    async def main():
+        create_runner()
+
+    exc = pytest.raises(RuntimeError, run, main)
+    exc.match('Already running asyncio in this thread')
@@ -1,8 +1,19 @@
 import threading
+import time
+from functools import partial
+from uuid import uuid4
 
 import pytest
 
-from anyio import run_async_from_thread, run_in_thread, create_task_group, sleep
+from anyio import (
+    run_async_from_thread, run_in_thread, create_task_group, sleep, get_max_worker_threads,
+    wait_all_tasks_blocked,
+    set_max_worker_threads, start_blocking_portal, create_event, BACKENDS,
+    get_worker_pool_statistics, set_worker_pool_saturation_callback, check_cancelled_from_thread,
+    current_effective_deadline_from_thread, current_effective_deadline, fail_after,
+    move_on_after, map_in_thread, finalize, create_thread_channel, create_worker_lane)
+from anyio._threads import CallbackBatch, WorkerLane, get_worker_pool
+from anyio.exceptions import CancelledError, ClosedResourceError, EndOfStream
 
 
 @pytest.mark.anyio
@@ -60,9 +71,469 @@ async def test_run_in_thread_exception():
     exc.match('^foo$')
 
 
+@pytest.mark.anyio
+async def test_run_in_thread_stop_iteration():
+    with pytest.raises(RuntimeError):
+        await run_in_thread(next, iter([]))
+
+
+@pytest.mark.anyio
+async def test_run_in_thread_named_pool():
+    result = await run_in_thread(lambda: threading.current_thread().name, pool='test_named')
+    assert result == 'AnyIO worker thread (test_named)'
+
+
+@pytest.mark.anyio
+async def test_max_worker_threads():
+    def thread_worker():
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(running, max_running)
+
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    lock = threading.Lock()
+    running = max_running = 0
+    set_max_worker_threads(2, pool='test_limited')
+    assert get_max_worker_threads('test_limited') == 2
+    async with create_task_group() as tg:
+        for _ in range(6):
+            await tg.spawn(partial(run_in_thread, thread_worker, pool='test_limited'))
+
+    assert max_running == 2
+
+
+def test_set_max_worker_threads_invalid():
+    exc = pytest.raises(ValueError, set_max_worker_threads, 0)
+    exc.match('max_threads must be at least 1')
+
+
+@pytest.mark.anyio
+async def test_worker_pool_statistics():
+    def thread_worker():
+        started.set()
+        release.wait()
+
+    # Pools are process wide, so use a fresh one to avoid counting calls from other test runs
+    pool = 'test_statistics_{}'.format(uuid4())
+    started = threading.Event()
+    release = threading.Event()
+    set_max_worker_threads(1, pool=pool)
+    async with create_task_group() as tg:
+        await tg.spawn(partial(run_in_thread, thread_worker, pool=pool))
+        await run_in_thread(started.wait)
+        await tg.spawn(partial(run_in_thread, time.sleep, 0, pool=pool))
+        async with fail_after(5):
+            while not get_worker_pool_statistics(pool).queued_calls:
+                await sleep(0.01)
+
+        statistics = get_worker_pool_statistics(pool)
+        release.set()
+
+    assert statistics.name == pool
+    assert statistics.threads == 1
+    assert statistics.active_calls == 1
+    assert statistics.queued_calls == 1
+    assert statistics.total_calls == 2
+    assert len(statistics.longest_running_calls) == 1
+    assert statistics.longest_running_calls[0][0].endswith('thread_worker')
+
+    statistics = get_worker_pool_statistics(pool)
+    assert statistics.active_calls == statistics.queued_calls == 0
+    assert sum(statistics.queue_wait_histogram) == 2
+    assert sum(statistics.run_time_histogram) == 2
+    assert len(statistics.histogram_buckets) == len(statistics.run_time_histogram)
+
+
+@pytest.mark.anyio
+async def test_worker_pool_saturation_callback():
+    release = threading.Event()
+    reports = []
+    set_max_worker_threads(1, pool='test_saturation')
+    set_worker_pool_saturation_callback(reports.append, pool='test_saturation')
+    async with create_task_group() as tg:
+        for _ in range(3):
+            await tg.spawn(partial(run_in_thread, release.wait, pool='test_saturation'))
+
+        await wait_all_tasks_blocked()
+        release.set()
+
+    assert len(reports) == 1
+    assert reports[0].name == 'test_saturation'
+    assert reports[0].queued_calls >= 1
+
+
+@pytest.mark.anyio
+async def test_check_cancelled_from_thread():
+    def thread_worker():
+        nonlocal thread_cancelled
+        started.set()
+        try:
+            while True:
+                check_cancelled_from_thread()
+                time.sleep(0.01)
+        except CancelledError:
+            thread_cancelled = True
+
+    started = threading.Event()
+    thread_cancelled = False
+    async with move_on_after(0.1):
+        await run_in_thread(thread_worker)
+
+    assert started.is_set()
+    assert thread_cancelled
+
+
+@pytest.mark.anyio
+async def test_run_in_thread_cancellable():
+    release = threading.Event()
+    async with move_on_after(0.1):
+        await run_in_thread(release.wait, cancellable=True)
+        pytest.fail('The call was not cancelled')
+
+    assert not release.is_set()
+    release.set()
+
+
+@pytest.mark.anyio
+async def test_current_effective_deadline_from_thread():
+    async with fail_after(5):
+        deadline = await current_effective_deadline()
+        assert await run_in_thread(current_effective_deadline_from_thread) == deadline
+
+    assert await run_in_thread(current_effective_deadline_from_thread) == float('inf')
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize('chunksize', [1, 3, 100])
+async def test_map_in_thread(chunksize):
+    results = []
+    async for result in map_in_thread(lambda x: x * 2, range(10), chunksize=chunksize):
+        results.append(result)
+
+    assert results == [x * 2 for x in range(10)]
+
+
+@pytest.mark.anyio
+async def test_map_in_thread_unordered():
+    def double(x):
+        if x == 0:
+            release.wait()
+
+        return x * 2
+
+    release = threading.Event()
+    results = []
+    async for result in map_in_thread(double, range(4), ordered=False):
+        results.append(result)
+        release.set()
+
+    assert results[0] != 0
+    assert sorted(results) == [0, 2, 4, 6]
+
+
+@pytest.mark.anyio
+async def test_map_in_thread_chunks():
+    before = get_worker_pool_statistics('test_map_chunks').total_calls
+    async for _ in map_in_thread(str, range(10), chunksize=4, pool='test_map_chunks'):
+        pass
+
+    assert get_worker_pool_statistics('test_map_chunks').total_calls - before == 3
+
+
+@pytest.mark.anyio
+async def test_map_in_thread_backpressure():
+    def produce():
+        nonlocal produced
+        for i in range(100):
+            produced += 1
+            yield i
+
+    produced = 0
+    async with finalize(map_in_thread(str, produce(), chunksize=2, max_concurrency=3)) as agen:
+        async for _ in agen:
+            assert produced <= 2 * 3 + 2
+            break
+
+    assert produced < 100
+
+
+@pytest.mark.anyio
+async def test_map_in_thread_exception():
+    def fail(x):
+        if x == 5:
+            raise ValueError('bad item')
+
+        return x
+
+    with pytest.raises(ValueError) as exc:
+        async for _ in map_in_thread(fail, range(10), chunksize=2):
+            pass
+
+    exc.match('bad item')
+
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'chunksize': 0}, 'chunksize must be at least 1'),
+    ({'max_concurrency': 0}, 'max_concurrency must be at least 1')
+], ids=['chunksize', 'max_concurrency'])
+@pytest.mark.anyio
+async def test_map_in_thread_invalid_arguments(kwargs, message):
+    with pytest.raises(ValueError) as exc:
+        async for _ in map_in_thread(str, range(10), **kwargs):
+            pass
+
+    exc.match(message)
+
+
+@pytest.mark.anyio
+async def test_worker_lane():
+    def thread_worker(index):
+        if index == 0:
+            release.wait()
+
+        calls.append((index, threading.get_ident()))
+
+    release = threading.Event()
+    calls = []
+    lane = create_worker_lane()
+    async with create_task_group() as tg:
+        # Let each task submit its call before spawning the next, as the scheduling order of newly
+        # spawned tasks is not guaranteed
+        for i in range(5):
+            await tg.spawn(partial(run_in_thread, thread_worker, i, pool=lane))
+            await wait_all_tasks_blocked()
+
+        release.set()
+
+    assert [index for index, _ in calls] == list(range(5))
+    assert len({thread_id for _, thread_id in calls}) == 1
+
+
+@pytest.mark.anyio
+async def test_worker_lane_exception():
+    lane = create_worker_lane()
+    with pytest.raises(ValueError):
+        await run_in_thread(int, 'x', pool=lane)
+
+    assert await run_in_thread(int, '5', pool=lane) == 5
+
+
+def test_worker_lane_submit_failure():
+    class FailingPool:
+        def submit(self, func, *args, target=None):
+            raise RuntimeError('cannot start a thread')
+
+    lane = WorkerLane(FailingPool())
+    exc = pytest.raises(RuntimeError, lane.submit, int, '5')
+    exc.match('cannot start a thread')
+
+    lane.pool = get_worker_pool()
+    assert lane.submit(int, '5').result(5) == 5
+
+
+def test_check_cancelled_from_unclaimed_thread():
+    exc = pytest.raises(RuntimeError, check_cancelled_from_thread)
+    exc.match('This function can only be run from an AnyIO worker thread')
+
+
 def test_run_async_from_unclaimed_thread():
     async def foo():
         pass
 
     exc = pytest.raises(RuntimeError, run_async_from_thread, foo)
     exc.match('This function can only be run from an AnyIO worker thread')
+
+
+class TestBlockingPortal:
+    @pytest.fixture(params=BACKENDS)
+    def portal(self, request):
+        with start_blocking_portal(request.param) as portal:
+            yield portal
+
+    def test_call(self, portal):
+        async def add(a, b):
+            assert threading.get_ident() == portal_thread_id
+            return a + b
+
+        portal_thread_id = portal._loop_thread.ident
+        assert portal.call(add, 1, 2) == 3
+        assert portal.call(add, 3, 4) == 7
+
+    def test_call_exception(self, portal):
+        async def fail():
+            raise ValueError('foo')
+
+        exc = pytest.raises(ValueError, portal.call, fail)
+        exc.match('^foo$')
+
+    def test_start_task_soon(self, portal):
+        async def get_event():
+            return create_event()
+
+        async def wait_for_event():
+            await event.wait()
+            return 'done'
+
+        event = portal.call(get_event)
+        future = portal.start_task_soon(wait_for_event)
+        assert not future.done()
+        portal.call(event.set)
+        assert future.result() == 'done'
+
+    def test_stop_cancel_remaining(self):
+        async def sleep_forever():
+            await sleep(100)
+
+        with start_blocking_portal() as portal:
+            future = portal.start_task_soon(sleep_forever)
+            portal.call(sleep, 0)
+            portal.stop(cancel_remaining=True)
+
+        assert future.exception() is not None
+        pytest.raises(RuntimeError, portal.call, sleep, 0).match('The portal has been stopped')
+
+    def test_call_from_event_loop_thread(self, portal):
+        async def call_portal():
+            portal.call(sleep, 0)
+
+        exc = pytest.raises(RuntimeError, portal.call, call_portal)
+        exc.match('This method cannot be called from the event loop thread')
+
+
+def test_callback_batch():
+    wakeups = []
+    results = []
+    batch = CallbackBatch(wakeups.append, None)
+    batch.call_soon(results.append, 1)
+    batch.call_soon(results.append, 2)
+    assert len(wakeups) == 1
+    assert results == []
+
+    wakeups[0]()
+    assert results == [1, 2]
+
+    batch.call_soon(results.append, 3)
+    assert len(wakeups) == 2
+
+
+def test_callback_batch_exception():
+    def fail(exc):
+        raise exc
+
+    wakeups = []
+    results = []
+    errors = []
+    batch = CallbackBatch(wakeups.append, lambda exc, func: errors.append((exc, func)))
+    error = ValueError('foo')
+    batch.call_soon(results.append, 1)
+    batch.call_soon(fail, error)
+    batch.call_soon(results.append, 2)
+    wakeups[0]()
+    assert results == [1, 2]
+    assert errors == [(error, fail)]
+
+    batch.call_soon(fail, KeyboardInterrupt())
+    batch.call_soon(results.append, 3)
+    pytest.raises(KeyboardInterrupt, wakeups[1])
+    assert results == [1, 2, 3]
+
+
+class TestThreadChannel:
+    @pytest.mark.anyio
+    async def test_send_receive(self):
+        def produce():
+            for i in range(100):
+                channel.send(i)
+
+            channel.close()
+
+        channel = create_thread_channel(10)
+        async with create_task_group() as tg:
+            await tg.spawn(run_in_thread, produce)
+            received = []
+            async for item in channel:
+                received.append(item)
+
+        assert received == list(range(100))
+
+    @pytest.mark.anyio
+    async def test_cancel_one_receiver(self):
+        async def receive():
+            received.append(await channel.receive())
+
+        async def receive_with_timeout():
+            async with move_on_after(0.1):
+                await channel.receive()
+
+        received = []
+        channel = create_thread_channel(1)
+        async with create_task_group() as tg:
+            await tg.spawn(receive)
+            await tg.spawn(receive_with_timeout)
+            await sleep(0.2)
+            channel.send('item')
+
+        assert received == ['item']
+
+    @pytest.mark.anyio
+    async def test_receive_batch(self):
+        channel = create_thread_channel(5)
+        for i in range(5):
+            channel.send(i)
+
+        assert await channel.receive_batch(3) == [0, 1, 2]
+        assert await channel.receive_batch() == [3, 4]
+
+    @pytest.mark.anyio
+    async def test_backpressure(self):
+        channel = create_thread_channel(2)
+        channel.send(1)
+        channel.send(2)
+        pytest.raises(TimeoutError, channel.send, 3, timeout=0.05)
+        assert await channel.receive() == 1
+        channel.send(3, timeout=0)
+
+    @pytest.mark.anyio
+    async def test_receive_after_close(self):
+        channel = create_thread_channel(2)
+        channel.send('foo')
+        channel.close()
+        pytest.raises(ClosedResourceError, channel.send, 'bar')
+        assert await channel.receive() == 'foo'
+        with pytest.raises(EndOfStream):
+            await channel.receive()
+
+    @pytest.mark.anyio
+    async def test_close_receiving_side(self):
+        def produce():
+            with pytest.raises(ClosedResourceError):
+                channel.send(3)
+
+        channel = create_thread_channel(2)
+        channel.send(1)
+        channel.send(2)
+        async with create_task_group() as tg:
+            await tg.spawn(run_in_thread, produce)
+            async with channel:
+                await wait_all_tasks_blocked()
+
+        with pytest.raises(ClosedResourceError):
+            await channel.receive()
+
+    @pytest.mark.anyio
+    async def test_receive_cancelled(self):
+        channel = create_thread_channel(1)
+        async with move_on_after(0.1):
+            await channel.receive()
+            pytest.fail('The receive operation was not cancelled')
+
+        channel.send('foo')
+        assert await channel.receive() == 'foo'
+
+    def test_invalid_capacity(self):
+        exc = pytest.raises(ValueError, create_thread_channel, 0)
+        exc.match('capacity must be at least 1')